@@ -0,0 +1,172 @@
+"""
+Benchmarks for the core engine hot paths.  Doesn't need Textual.
+
+    python benchmarks/bench.py                      # run, compare against benchmarks/baseline.json
+    python benchmarks/bench.py --update-baseline    # run, and store the results as the new baseline
+
+Timings are per call, in microseconds.  A benchmark counts as a regression when its median is more than
+`--threshold` (default 25%) slower than the baseline; any regression makes the script exit with status 1.
+Baselines are only comparable on the machine they were recorded on, so refresh it when switching machines.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from statistics import median, quantiles
+from time import perf_counter_ns
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from game import GameState  # noqa: E402
+from game.advisor import Advisor  # noqa: E402
+from game.sim import new_game, can_buy_upgrade  # noqa: E402
+from shared import ProducerType, ResourceType, Status, UpgradeType, abbrev_num, style_info  # noqa: E402
+from shared.conversion import format_num  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+# Upgrades with special purchase paths, which the late-game fixture leaves unbought so they can be measured
+SPECIAL_UPGRADES = (UpgradeType.INDUSTRIAL_FARMING, UpgradeType.TREE_FARMING)
+# How many colonies the multi-colony tick is timed with
+COLONIES = 100_000
+
+
+def played(ticks: int, skip: tuple[UpgradeType, ...] = ()) -> GameState:
+    """A state after `ticks` ticks of greedy play with steady clicking, never buying anything in `skip`"""
+    state = new_game()
+    for _ in range(ticks):
+        state.resources[ResourceType.FOOD].total += int(5 * state.click_modifier)
+        for upgrade in state.upgrades:
+            if upgrade not in skip and can_buy_upgrade(state, upgrade):
+                state.purchase_upgrade(upgrade)
+        for producer in reversed(state.producers):
+            state.purchase_producer(producer, 0)
+        state.tick()
+    return state
+
+
+def fixtures() -> dict[str, GameState]:
+    late = played(1400, skip=SPECIAL_UPGRADES)
+    # Plenty of everything, so every purchase benchmark actually buys something
+    for resource in late.resources.values():
+        resource.total += 10**7
+    return {'early': played(60), 'mid': played(600), 'late': late}
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    setup: Callable[[], Any] = lambda: None,
+    rounds: int = 100,
+    inner: int = 20,
+    warmup: int = 10,
+) -> dict[str, float]:
+    """
+    Times `fn(setup())`, with `setup` left out of the timing.
+
+    Each round times `inner` calls back to back (each on its own `setup()` result) so the timer's own overhead
+    doesn't dominate, and the first `warmup` rounds are thrown away so memoized caches are already filled.
+    """
+    samples = []
+    gc.disable()
+    try:
+        for _ in range(warmup + rounds):
+            args = [setup() for _ in range(inner)]
+            start = perf_counter_ns()
+            for arg in args:
+                fn(arg)
+            samples.append((perf_counter_ns() - start) / inner / 1000)
+    finally:
+        gc.enable()
+    samples = samples[warmup:]
+    return {'median_us': round(median(samples), 3), 'p90_us': round(quantiles(samples, n=10)[-1], 3)}
+
+
+def run_benchmarks() -> dict[str, dict]:
+    results = {}
+    states = fixtures()
+    for name, state in states.items():
+        copy = lambda state=state: state.clone()
+        results[f'tick[{name}]'] = measure(GameState.tick, copy)
+        results[f'update_entities[{name}]'] = measure(GameState.update_entities, lambda state=state: state)
+        advisor = Advisor()
+        results[f'advisor_best[{name}]'] = measure(
+            lambda s, advisor=advisor: advisor.best(s), lambda state=state: state
+        )
+        for label, amount in (('1', 1), ('10', 10), ('max', 0)):
+            results[f'purchase_producer[{name}, {label}]'] = measure(
+                lambda s, amount=amount: s.purchase_producer(ProducerType.ANT, amount), copy
+            )
+    for upgrade in (UpgradeType.METAL_TOOLS, *SPECIAL_UPGRADES):
+
+        def setup(upgrade=upgrade) -> GameState:
+            fresh = states['late'].clone()
+            fresh.upgrades[upgrade].purchased = False
+            fresh.upgrades[upgrade].status = Status.ENABLED
+            return fresh
+
+        results[f'purchase_upgrade[{upgrade}]'] = measure(lambda s, u=upgrade: s.purchase_upgrade(u), setup)
+    numbers = [0, 7, 999, 12_345, 6_789_012, 4.5e12, 1.23e29]
+    results['abbrev_num'] = measure(
+        lambda _: [abbrev_num(n) for n in numbers],
+    )
+    results['format_num'] = measure(lambda _: [format_num(n) for n in numbers])
+    infos = [u.info for u in new_game().upgrades.values()] + ['[green]⬆[/] Soldiers rate by 1.85x for 30s']
+    results['style_info'] = measure(lambda _: [style_info(i) for i in infos])
+    keys = [*ResourceType, *ProducerType, *UpgradeType]
+    results['get_status'] = measure(lambda s: [s.get_status(key) for key in keys], lambda: states['mid'])
+    try:
+        from game.colonies import Colonies
+    except ImportError:
+        # numpy is optional (the `sim` extra)
+        return results
+    colonies = Colonies(COLONIES)
+    colonies.producer_totals[:] = 100
+    results[f'colonies_tick[{COLONIES}]'] = measure(Colonies.tick, lambda: colonies, rounds=10, inner=2, warmup=2)
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<45} {result["median_us"]:>12.2f}us  (new)')
+            continue
+        before = baseline[name]['median_us']
+        change = (result['median_us'] - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:<45} {result["median_us"]:>12.2f}us  {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--output', type=Path, help='Also write the results JSON here')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown, as a fraction')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'results': run_benchmarks()}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n')
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + '\n')
+        print(f'Wrote baseline to {args.baseline}')
+        return 0
+    baseline = json.loads(args.baseline.read_text())['results'] if args.baseline.exists() else {}
+    regressions = compare(report['results'], baseline, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Startup-time benchmark: how long each entry point takes to import, and to reach its first tick or frame.
+
+    python benchmarks/startup.py              # run every scenario, compare against the budgets
+    python benchmarks/startup.py --runs 20    # more runs per scenario, for a steadier median
+
+Every run is a fresh interpreter, timed from inside it, so the interpreter's own startup isn't counted.  The first
+run of each scenario is thrown away, since it may have to compile bytecode or the content cache.  A scenario whose
+median is over its budget makes the script exit with status 1, and so does the core (`game` + `shared`) pulling in
+Textual or Rich.  Budgets are in milliseconds, for a reasonably quick machine; pass `--scale` on a slower one.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+
+SRC = Path(__file__).resolve().parent.parent / 'src'
+
+# Each scenario is a snippet run after `start = perf_counter()`; it ends by setting `done`
+SCENARIOS = {
+    'import[core]': 'import game\ndone = perf_counter()',
+    'first_tick[headless]': 'from game import GameState\nGameState().tick()\ndone = perf_counter()',
+    'import[journal]': 'import game.journal\ndone = perf_counter()',
+    'import[sim]': 'import game.sim\ndone = perf_counter()',
+    'first_frame[tui]': """
+import asyncio
+from main import IdleApp
+from widgets import GameContainer
+
+first_frame = GameContainer.render_state
+
+
+def render_state(self, *args):
+    global done
+    first_frame(self, *args)
+    done = done or perf_counter()
+
+
+GameContainer.render_state = render_state
+
+
+async def run():
+    async with IdleApp().run_test():
+        pass
+
+
+done = None
+asyncio.run(run())
+""",
+}
+BUDGETS_MS = {
+    'import[core]': 100,
+    'first_tick[headless]': 100,
+    'import[journal]': 130,
+    'import[sim]': 130,
+    'first_frame[tui]': 750,
+}
+# Runs in a scratch directory, since the TUI scenario starts a real (headless) app that writes a save and journal
+CHILD = """
+import json, sys
+from time import perf_counter
+start = perf_counter()
+{snippet}
+print(json.dumps({{'ms': (done - start) * 1000, 'gui': sorted({{'textual', 'rich'}} & set(sys.modules))}}))
+"""
+
+
+def run_once(snippet: str) -> dict:
+    env = {**os.environ, 'PYTHONPATH': str(SRC)}
+    with TemporaryDirectory() as scratch:
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD.format(snippet=snippet)], cwd=scratch, env=env, capture_output=True, text=True
+        )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies every budget')
+    parser.add_argument('--output', type=Path, help='Also write the results JSON here')
+    args = parser.parse_args(argv)
+
+    results, failures = {}, []
+    for name, snippet in SCENARIOS.items():
+        try:
+            runs = [run_once(snippet) for _ in range(args.runs + 1)][1:]
+        except RuntimeError as e:
+            # Textual isn't needed for anything but the TUI scenario
+            print(f'{name:<25} skipped ({e})')
+            continue
+        took = median(run['ms'] for run in runs)
+        budget = BUDGETS_MS[name] * args.scale
+        results[name] = {'median_ms': round(took, 1), 'budget_ms': budget}
+        flag = ''
+        if took > budget:
+            flag = '  OVER BUDGET'
+            failures.append(name)
+        if name.startswith(('import[', 'first_tick')) and runs[0]['gui']:
+            flag += f'  imports {", ".join(runs[0]["gui"])}'
+            failures.append(name)
+        print(f'{name:<25} {took:>8.1f}ms  (budget {budget:.0f}ms){flag}')
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+    if failures:
+        print(f'\n{len(failures)} startup check(s) failed')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
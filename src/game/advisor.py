@@ -0,0 +1,214 @@
+"""
+Ranks what to buy next by payback time, for the "best next buy" highlight and the auto-buyer.
+
+A candidate's payback is its cost divided by the production it adds, with every Resource valued at
+`1 / (income + 1)`: a unit of something you make a lot of is worth less than a unit of something scarce.  With a
+single Resource that's just cost / gain, the usual idle-game payback period.  A Producer adds its own
+`product.rate` (times any active Boost) per unit bought; an Upgrade adds `modifier - 1` times the current
+production of each Producer it modifies.
+
+Nothing is simulated.  Each candidate keeps its cost and gain vectors, and when the state's revision moves on only
+the candidates reading a Producer that actually changed get rebuilt, and only the ones touching a Resource whose
+income changed get re-scored.  Picking the best candidate walks them in payback order and stops as soon as no
+later one can win, so a tick with nothing bought costs a revision check and a handful of comparisons.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from math import inf
+from typing import Any, Self
+
+from shared import ResourceType, ProducerType, UpgradeType, Status
+
+type Key = ProducerType | UpgradeType
+
+# Candidates further than this many ticks from affordable aren't considered at all
+NEAR_TICKS = 120
+# The most purchases a single `auto_buy` makes, so a huge stockpile can't stall a frame
+MAX_AUTOBUYS = 100
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        return inf
+
+
+@dataclass(slots=True)
+class Candidate:
+    key: Key
+    cost: dict[ResourceType, float] = field(default_factory=dict)
+    # Extra production per tick if this gets bought
+    gain: dict[ResourceType, float] = field(default_factory=dict)
+    payback: float = inf
+
+
+class Advisor:
+    def __init__(self: Self):
+        self.revision: int | None = None
+        self.candidates: dict[Key, Candidate] = {}
+        # Candidates in payback order
+        self.ranking: list[Candidate] = []
+        # Production per tick of every Resource
+        self.income: dict[ResourceType, float] = {}
+        # What each Producer's production was last time it was looked at, to spot the ones that changed
+        self.production: dict[ProducerType, tuple] = {}
+        # Which candidates' gains read each Producer, and which candidates cost or produce each Resource
+        self.readers: dict[ProducerType, set[Key]] = {}
+        self.users: dict[ResourceType, set[Key]] = {}
+
+    def _build(self: Self, state: Any) -> None:
+        self.candidates = {key: Candidate(key) for key in (*state.producers, *state.upgrades)}
+        self.ranking = list(self.candidates.values())
+        self.income = {rtype: 0.0 for rtype in state.resources}
+        self.production = {}
+        self.readers = {ptype: {ptype} for ptype in state.producers}
+        self.users = {rtype: set() for rtype in state.resources}
+        for ptype, producer in state.producers.items():
+            self.users[producer.product.resource].add(ptype)
+            for rtype in producer.cost:
+                self.users[rtype].add(ptype)
+        for utype, upgrade in state.upgrades.items():
+            for rtype in upgrade.cost:
+                self.users[rtype].add(utype)
+            for ptype in upgrade.modifiers:
+                if ptype in self.readers:
+                    self.readers[ptype].add(utype)
+                    self.users[state.producers[ptype].product.resource].add(utype)
+
+    @staticmethod
+    def _production(state: Any, producer: Any) -> float:
+        if producer.status != Status.ENABLED:
+            return 0.0
+        boost = state.boost(producer.name)
+        return producer.product.rate * boost * producer.total * state.DEBUG_MULTIPLIER
+
+    def _rebuild(self: Self, state: Any, key: Key) -> None:
+        candidate = self.candidates[key]
+        if key in state.producers:
+            producer = state.producers[key]
+            boost = state.boost(key)
+            candidate.cost = {rtype: _float(cost) for rtype, cost in producer.cost.items()}
+            candidate.gain = {producer.product.resource: producer.product.rate * boost * state.DEBUG_MULTIPLIER}
+            return
+        upgrade = state.upgrades[key]
+        candidate.cost = {rtype: _float(cost) for rtype, cost in upgrade.cost.items()}
+        candidate.gain = {}
+        # Boosts and replacements trade away whole Producers, which a payback time can't price
+        if upgrade.boost or upgrade.replace:
+            return
+        for ptype, modifier in upgrade.modifiers.items():
+            if ptype not in state.producers:
+                continue
+            producer = state.producers[ptype]
+            rtype = producer.product.resource
+            candidate.gain[rtype] = candidate.gain.get(rtype, 0.0) + self._production(state, producer) * (modifier - 1)
+
+    def _score(self: Self, candidate: Candidate) -> None:
+        income = self.income
+        value = sum(gain / (income[rtype] + 1) for rtype, gain in candidate.gain.items())
+        if value <= 0:
+            candidate.payback = inf
+            return
+        cost = sum(cost / (income[rtype] + 1) for rtype, cost in candidate.cost.items())
+        candidate.payback = cost / value
+
+    def refresh(self: Self, state: Any) -> None:
+        """Brings the scores up to date with `state`.  Free when nothing was bought or unlocked since last time."""
+        if state.revision == self.revision and self.candidates:
+            return
+        touched: set[Key] = set()
+        if not self.candidates:
+            self._build(state)
+            touched = set(self.candidates)
+        self.revision = state.revision
+        resources: set[ResourceType] = set()
+        for ptype, producer in state.producers.items():
+            seen = (producer.total, producer.product.rate, state.boost(ptype), producer.status)
+            if self.production.get(ptype) == seen:
+                continue
+            self.production[ptype] = seen
+            touched |= self.readers[ptype]
+            resources.add(producer.product.resource)
+        if not touched:
+            return
+        for rtype in resources:
+            self.income[rtype] = sum(
+                self._production(state, p) for p in state.producers.values() if p.product.resource == rtype
+            )
+        for key in touched:
+            self._rebuild(state, key)
+        rescore = set(touched)
+        for rtype in resources:
+            rescore |= self.users[rtype]
+        for key in rescore:
+            self._score(self.candidates[key])
+        self.ranking.sort(key=lambda candidate: candidate.payback)
+
+    def _wait(self: Self, state: Any, candidate: Candidate) -> float:
+        """Ticks until `candidate` is affordable at the current income"""
+        wait = 0.0
+        for rtype, cost in candidate.cost.items():
+            short = cost - _float(state.resources[rtype].total)
+            if short > 0:
+                income = self.income[rtype]
+                wait = max(wait, short / income if income > 0 else inf)
+        return wait
+
+    @staticmethod
+    def _eligible(state: Any, key: Key) -> bool:
+        if key in state.producers:
+            return state.producers[key].status == Status.ENABLED
+        upgrade = state.upgrades[key]
+        return upgrade.status == Status.ENABLED and not upgrade.purchased
+
+    @staticmethod
+    def affordable(state: Any, key: Key) -> bool:
+        if key in state.producers:
+            return state.affordable(key) > 0
+        return all(state.resources[r].total >= c for r, c in state.upgrades[key].cost.items())
+
+    def best(self: Self, state: Any) -> Key | None:
+        """
+        The candidate that pays for itself soonest counting the wait to afford it, among those affordable within
+        NEAR_TICKS.  None if nothing is.
+        """
+        self.refresh(state)
+        best, best_time = None, inf
+        for candidate in self.ranking:
+            if candidate.payback >= best_time:
+                # Ranked by payback, so nothing from here on can beat it even without a wait
+                break
+            if not self._eligible(state, candidate.key):
+                continue
+            wait = self._wait(state, candidate)
+            if wait <= NEAR_TICKS and wait + candidate.payback < best_time:
+                best, best_time = candidate.key, wait + candidate.payback
+        return best
+
+    def next_purchase(self: Self, state: Any) -> Key | None:
+        """
+        What the auto-buyer should buy right now, or None to save up.
+
+        Upgrades with no payback (unlocks, folds, Gather upgrades) are bought as soon as they're affordable;
+        otherwise it's the `best` candidate, but only once it's affordable, rather than something worse
+        that happens to be affordable already.
+        """
+        self.refresh(state)
+        for key in state.upgrades:
+            if self.candidates[key].payback == inf and self._eligible(state, key) and self.affordable(state, key):
+                return key
+        best = self.best(state)
+        if best is not None and self.affordable(state, best):
+            return best
+        return None
+
+    def auto_buy(self: Self, state: Any, buy: Callable[[Key], None]) -> int:
+        """Hands everything `next_purchase` picks to `buy`, one at a time.  Returns how many were bought."""
+        for count in range(MAX_AUTOBUYS):
+            key = self.next_purchase(state)
+            if key is None:
+                return count
+            buy(key)
+        return MAX_AUTOBUYS
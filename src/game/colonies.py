@@ -0,0 +1,508 @@
+"""
+Many independent games ("colonies") in one process, for hosting a shared leaderboard and for load testing.
+
+Requires the optional `numpy` dependency (`pip install idle-ant[sim]`).  Every colony's Resource totals, Producer
+totals, rates and Boosts, and every entity's status, live in 2-D arrays (colony × entity, columns in the game's
+entity order, see `game.registry`), so `Colonies.tick` advances every colony at once: production is a few
+vectorized ops per Producer, the unlock rules are the same compiled `Rule`s a single game checks (one column at
+a time, in the same order), and Boost timers count down in one op.  The arrays are column-major, so each entity's
+column is contiguous.
+
+`Colonies.colony(i)` is a GameState whose records read and write colony `i`'s cells, so purchases, commands,
+saves and everything else written against GameState work on a colony as-is.
+
+Totals are float64 inside, which BigNum matches bit-for-bit up to float range (about 1e308).
+"""
+
+from collections.abc import Callable, Iterator
+from math import ceil, isnan
+from typing import Self
+
+import numpy as np
+
+from shared import ResourceType, ProducerType, UpgradeType, Status, BigNum, style_info
+from shared.constants import Boost, Replace
+from game.effects import Effect, Effects, Target
+from game.content import RESOURCE_CATALOG, PRODUCER_CATALOG, UPGRADE_CATALOG
+from game.game_state import BOOST_PER_20, GameState
+from game.ladder import ladder_for
+from game.producer import Producer, ProducerSpec, Product
+from game.registry import REGISTRY
+from game.resource import Resource, ResourceSpec
+from game.unlocks import UnlockIndex
+from game.upgrade import Upgrade, UpgradeSpec
+
+# Which Upgrade's Boost each Producer can get, as the source of its effect
+_SOURCES = {spec.boost.target: spec.name for spec in UPGRADE_CATALOG.values() if spec.boost}
+
+
+def _columns(mask: int) -> list[int]:
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+class Colonies:
+    def __init__(self: Self, count: int):
+        self.count = count
+        self.resource_index = {key: j for j, key in enumerate(RESOURCE_CATALOG)}
+        self.producer_index = {key: j for j, key in enumerate(PRODUCER_CATALOG)}
+        self.producer_keys = list(PRODUCER_CATALOG)
+        self.upgrade_index = {key: j for j, key in enumerate(UPGRADE_CATALOG)}
+        resources, producers, upgrades = len(RESOURCE_CATALOG), len(PRODUCER_CATALOG), len(UPGRADE_CATALOG)
+        specs = [*RESOURCE_CATALOG.values(), *PRODUCER_CATALOG.values(), *UPGRADE_CATALOG.values()]
+
+        def column(values: list, dtype: type) -> np.ndarray:
+            return np.asfortranarray(np.tile(np.array(values, dtype=dtype), (count, 1)))
+
+        self.totals = np.zeros((count, resources), order='F')
+        self.progress = np.zeros((count, resources), order='F')
+        self.producer_totals = np.zeros((count, producers), dtype=np.int64, order='F')
+        self.rates = column([spec.product.rate for spec in PRODUCER_CATALOG.values()], np.float64)
+        self.boosted = np.zeros((count, producers), dtype=bool, order='F')
+        self.boost_rates = np.ones((count, producers), order='F')
+        self.boost_timers = np.zeros((count, producers), dtype=np.int64, order='F')
+        # Indexed by entity handle
+        self.status = column([spec.status == Status.ENABLED for spec in specs], bool)
+        self.purchased = np.zeros((count, upgrades), dtype=bool, order='F')
+        # Whether each Upgrade still holds its Boost (it's handed over when bought), and the unrounded rate the last
+        # tick gave it (NaN before the first tick)
+        self.upgrade_boosts = column([spec.boost is not None for spec in UPGRADE_CATALOG.values()], bool)
+        self.upgrade_boost_rates = np.full((count, upgrades), np.nan, order='F')
+        self.click_modifiers = np.ones(count)
+        # The rules (and what each one reads) are the same for every colony, so views share one built index
+        self.unlocks: UnlockIndex | None = None
+
+        self.products = [self.resource_index[spec.product.resource] for spec in PRODUCER_CATALOG.values()]
+        self.upgrade_boost_sources = [
+            (j, self.producer_index[spec.boost.cost])
+            for j, spec in enumerate(UPGRADE_CATALOG.values())
+            if spec.boost and spec.boost.cost in self.producer_index
+        ]
+        # Every Rule as array columns: (handle, bought, unless bought, enabled, [(totals, column, minimum)])
+        first_upgrade = resources + producers
+        self.rules = []
+        for handle, spec in enumerate(specs):
+            rule = spec.rule
+            minimums = []
+            for entity, minimum in rule.min_totals:
+                if entity < resources:
+                    minimums.append((self.totals, entity, minimum))
+                else:
+                    minimums.append((self.producer_totals, entity - resources, minimum))
+            self.rules.append(
+                (
+                    handle,
+                    [i - first_upgrade for i in _columns(rule.bought)],
+                    [i - first_upgrade for i in _columns(rule.unless_bought)],
+                    _columns(rule.enabled),
+                    minimums,
+                )
+            )
+
+    def __len__(self: Self) -> int:
+        return self.count
+
+    def tick(self: Self, ticks: int = 1) -> None:
+        """Runs `ticks` ticks of every colony; each one ends exactly where `GameState.tick` would"""
+        for _ in range(ticks):
+            self._produce()
+            self._update_statuses()
+            self._update_boosts()
+
+    def _produce(self: Self) -> None:
+        first_producer = len(self.resource_index)
+        for j, r in enumerate(self.products):
+            boost = np.where(self.boosted[:, j], self.boost_rates[:, j], 1.0)
+            # Same multiplication order as `GameState.tick`, so the floats come out bit-for-bit identical
+            produced = self.rates[:, j] * boost * self.producer_totals[:, j] * GameState.DEBUG_MULTIPLIER
+            produced[~self.status[:, first_producer + j]] = 0.0
+            # For numbers >= 0, floor and subtract is exactly `divmod(x, 1)`, and much faster than np.divmod
+            whole = np.floor(produced)
+            carried = self.progress[:, r] + (produced - whole)
+            extra = np.floor(carried)
+            self.progress[:, r] = carried - extra
+            self.totals[:, r] += whole + extra
+
+    def _update_statuses(self: Self) -> None:
+        # In entity order, so a status flipped early in the pass is seen by later rules, as in `UnlockIndex.update`
+        for handle, bought, unless_bought, enabled, minimums in self.rules:
+            passes = np.ones(self.count, dtype=bool)
+            for j in bought:
+                passes &= self.purchased[:, j]
+            for j in unless_bought:
+                passes &= ~self.purchased[:, j]
+            for h in enabled:
+                passes &= self.status[:, h]
+            for totals, j, minimum in minimums:
+                passes &= totals[:, j] >= minimum
+            self.status[:, handle] = passes
+
+    def _update_boosts(self: Self) -> None:
+        self.boost_timers -= self.boosted
+        self.boosted &= self.boost_timers >= 0
+        for j, source in self.upgrade_boost_sources:
+            rate = 1.0 + (self.producer_totals[:, source] / 20 * BOOST_PER_20)
+            np.copyto(self.upgrade_boost_rates[:, j], rate, where=self.upgrade_boosts[:, j])
+
+    def colony(self: Self, index: int) -> 'ColonyState':
+        """A GameState reading and writing colony `index`, which stays valid until the arrays are replaced"""
+        if not -self.count <= index < self.count:
+            raise IndexError(f'colony {index} out of range for {self.count} colonies')
+        return ColonyState(self, index % self.count)
+
+    def ranking(self: Self, resource: ResourceType, top: int = 10) -> list[tuple[int, float]]:
+        """The `top` colonies with the highest total of `resource`, as (colony, total) pairs, highest first"""
+        totals = self.totals[:, self.resource_index[resource]]
+        top = min(top, self.count)
+        best = np.argpartition(totals, -top)[-top:] if top else np.array([], dtype=np.intp)
+        best = best[np.argsort(-totals[best], kind='stable')]
+        return [(int(i), float(totals[i])) for i in best]
+
+
+class _Cell:
+    __slots__ = ('colonies', 'row', 'column')
+
+    def __init__(self: Self, colonies: Colonies, row: int, column: int):
+        self.colonies = colonies
+        self.row = row
+        self.column = column
+
+
+class ResourceView(_Cell):
+    __slots__ = ('spec',)
+
+    def __init__(self: Self, colonies: Colonies, row: int, spec: ResourceSpec):
+        super().__init__(colonies, row, colonies.resource_index[spec.name])
+        self.spec = spec
+
+    @property
+    def name(self: Self) -> ResourceType:
+        return self.spec.name
+
+    @property
+    def total(self: Self) -> BigNum:
+        return BigNum(float(self.colonies.totals[self.row, self.column]))
+
+    @total.setter
+    def total(self: Self, value: int | float | BigNum) -> None:
+        self.colonies.totals[self.row, self.column] = float(value)
+
+    @property
+    def progress(self: Self) -> float:
+        return float(self.colonies.progress[self.row, self.column])
+
+    @progress.setter
+    def progress(self: Self, value: float) -> None:
+        self.colonies.progress[self.row, self.column] = value
+
+    @property
+    def status(self: Self) -> Status:
+        return Status.from_bool(self.colonies.status[self.row, REGISTRY.handles[self.spec.name]])
+
+    @status.setter
+    def status(self: Self, value: Status) -> None:
+        self.colonies.status[self.row, REGISTRY.handles[self.spec.name]] = value == Status.ENABLED
+
+    def produce(self: Self, total: int | float | BigNum, progress: float) -> None:
+        extra, self.progress = divmod(self.progress + progress, 1)
+        self.total += total + extra
+
+    def clone(self: Self) -> Resource:
+        return Resource(self.spec, self.total, self.progress, self.status)
+
+
+class ProductView(_Cell):
+    __slots__ = ('resource',)
+
+    def __init__(self: Self, colonies: Colonies, row: int, column: int, resource: ResourceType):
+        super().__init__(colonies, row, column)
+        self.resource = resource
+
+    @property
+    def rate(self: Self) -> float:
+        return float(self.colonies.rates[self.row, self.column])
+
+    @rate.setter
+    def rate(self: Self, value: float) -> None:
+        self.colonies.rates[self.row, self.column] = value
+
+
+class ProducerView(_Cell):
+    __slots__ = ('spec',)
+
+    def __init__(self: Self, colonies: Colonies, row: int, spec: ProducerSpec):
+        super().__init__(colonies, row, colonies.producer_index[spec.name])
+        self.spec = spec
+
+    @property
+    def name(self: Self) -> ProducerType:
+        return self.spec.name
+
+    @property
+    def replaced(self: Self) -> ProducerType | None:
+        return self.spec.replaced
+
+    @property
+    def total(self: Self) -> int:
+        return int(self.colonies.producer_totals[self.row, self.column])
+
+    @total.setter
+    def total(self: Self, value: int) -> None:
+        self.colonies.producer_totals[self.row, self.column] = value
+
+    @property
+    def cost(self: Self) -> dict[ResourceType, BigNum]:
+        # Every purchase moves the cost one step up its ladder, so the next cost is always `total` steps past the base
+        costs = {}
+        for resource, base in self.spec.cost.items():
+            ladder, position = ladder_for(base)
+            costs[resource] = ladder.cost_at(position + self.total)
+        return costs
+
+    @cost.setter
+    def cost(self: Self, value: dict[ResourceType, BigNum]) -> None:
+        # Worked out from `total` instead, which every purchase moves along with the cost
+        pass
+
+    @property
+    def product(self: Self) -> ProductView:
+        return ProductView(self.colonies, self.row, self.column, self.spec.product.resource)
+
+    @property
+    def status(self: Self) -> Status:
+        return Status.from_bool(self.colonies.status[self.row, REGISTRY.handles[self.spec.name]])
+
+    @status.setter
+    def status(self: Self, value: Status) -> None:
+        self.colonies.status[self.row, REGISTRY.handles[self.spec.name]] = value == Status.ENABLED
+
+    def clone(self: Self) -> Producer:
+        product = Product(self.spec.product.resource, self.product.rate)
+        return Producer(self.spec, self.cost, product, self.total, self.status)
+
+
+class ColonyEffects:
+    """
+    A colony's running effects, kept in the Boost arrays so `Colonies.tick` counts them all down at once.
+
+    The arrays hold one effect per Producer, in whole ticks, so a new one on a Producer replaces the last, and
+    effects on Resources or the "Gather" button aren't supported here.
+    """
+
+    def __init__(self: Self, colonies: Colonies, row: int):
+        self.colonies = colonies
+        self.row = row
+        self.now = 0.0
+        # Bumped by everything here that starts or ends an effect (see `Effects.changes`)
+        self.changes = 0
+        # Only called for what runs out through `advance`, not in `Colonies.tick`
+        self.listeners: list[Callable[[Effect], None]] = []
+
+    def _effect(self: Self, j: int) -> Effect:
+        target = self.colonies.producer_keys[j]
+        multiplier = float(self.colonies.boost_rates[self.row, j])
+        expires = self.now + int(self.colonies.boost_timers[self.row, j]) + 1
+        return Effect(target, multiplier, expires, _SOURCES.get(target), j)
+
+    def __iter__(self: Self) -> Iterator[Effect]:
+        return iter([self._effect(j) for j in np.flatnonzero(self.colonies.boosted[self.row])])
+
+    def __len__(self: Self) -> int:
+        return int(np.count_nonzero(self.colonies.boosted[self.row]))
+
+    def add(self: Self, target: Target, multiplier: float, duration: float, source: str | None = None) -> Effect:
+        if target not in self.colonies.producer_index:
+            raise ValueError(f'Colonies can only run effects on Producers, not {target}')
+        j = self.colonies.producer_index[target]
+        self.colonies.boosted[self.row, j] = True
+        self.colonies.boost_rates[self.row, j] = multiplier
+        # The timer counts the ticks left after the current one
+        self.colonies.boost_timers[self.row, j] = ceil(duration) - 1
+        self.changes += 1
+        return self._effect(j)
+
+    def cancel(self: Self, effect: Effect) -> None:
+        self.colonies.boosted[self.row, self.colonies.producer_index[effect.target]] = False
+        self.changes += 1
+
+    def clear(self: Self) -> None:
+        self.colonies.boosted[self.row] = False
+        self.changes += 1
+
+    def multiplier(self: Self, target: Target) -> float:
+        j = self.colonies.producer_index.get(target)
+        if j is None or not self.colonies.boosted[self.row, j]:
+            return 1.0
+        return float(self.colonies.boost_rates[self.row, j])
+
+    def active(self: Self, target: Target) -> bool:
+        j = self.colonies.producer_index.get(target)
+        return j is not None and bool(self.colonies.boosted[self.row, j])
+
+    def on(self: Self, target: Target) -> list[Effect]:
+        return [self._effect(self.colonies.producer_index[target])] if self.active(target) else []
+
+    def remaining(self: Self, effect: Effect) -> float:
+        return effect.expires - self.now
+
+    def next_expiry(self: Self) -> float | None:
+        boosted = self.colonies.boosted[self.row]
+        if not boosted.any():
+            return None
+        return float(self.colonies.boost_timers[self.row, boosted].min()) + 1
+
+    def advance(self: Self, seconds: float) -> list[Effect]:
+        ticks = int(seconds)
+        boosted, timers = self.colonies.boosted[self.row], self.colonies.boost_timers[self.row]
+        timers -= boosted * ticks
+        expired = [self._effect(j) for j in np.flatnonzero(boosted & (timers < 0))]
+        boosted &= timers >= 0
+        self.now += ticks
+        if expired:
+            self.changes += 1
+        for effect in expired:
+            for listener in self.listeners:
+                listener(effect)
+        return expired
+
+    def clone(self: Self) -> Effects:
+        """A plain Effects with the same effects running"""
+        effects = Effects()
+        for effect in self:
+            effects.add(effect.target, effect.multiplier, self.remaining(effect), effect.source)
+        return effects
+
+
+class UpgradeBoostView(_Cell):
+    """The Boost an Upgrade hands over when it's bought, whose rate follows its `cost` Producer until then"""
+
+    __slots__ = ('cost', 'target', 'timer')
+
+    def __init__(self: Self, colonies: Colonies, row: int, column: int, boost: Boost):
+        super().__init__(colonies, row, column)
+        self.cost, self.target, self.timer = boost.cost, boost.target, boost.timer
+
+    @property
+    def rate(self: Self) -> float:
+        rate = float(self.colonies.upgrade_boost_rates[self.row, self.column])
+        return 1.0 if isnan(rate) else round(rate, 2)
+
+    @rate.setter
+    def rate(self: Self, value: float) -> None:
+        self.colonies.upgrade_boost_rates[self.row, self.column] = value
+
+
+class UpgradeView(_Cell):
+    __slots__ = ('spec',)
+
+    def __init__(self: Self, colonies: Colonies, row: int, spec: UpgradeSpec):
+        super().__init__(colonies, row, colonies.upgrade_index[spec.name])
+        self.spec = spec
+
+    @property
+    def name(self: Self) -> UpgradeType:
+        return self.spec.name
+
+    @property
+    def cost(self: Self) -> dict[ResourceType, int]:
+        return self.spec.cost
+
+    @property
+    def modifiers(self: Self) -> dict[ProducerType, float]:
+        return self.spec.modifiers
+
+    @property
+    def replace(self: Self) -> Replace | None:
+        return self.spec.replace
+
+    @property
+    def purchased(self: Self) -> bool:
+        return bool(self.colonies.purchased[self.row, self.column])
+
+    @purchased.setter
+    def purchased(self: Self, value: bool) -> None:
+        self.colonies.purchased[self.row, self.column] = value
+
+    @property
+    def total(self: Self) -> int:
+        return int(self.purchased)
+
+    @total.setter
+    def total(self: Self, value: int) -> None:
+        # Upgrades are bought once, so this always matches `purchased`
+        pass
+
+    @property
+    def status(self: Self) -> Status:
+        return Status.from_bool(self.colonies.status[self.row, REGISTRY.handles[self.spec.name]])
+
+    @status.setter
+    def status(self: Self, value: Status) -> None:
+        self.colonies.status[self.row, REGISTRY.handles[self.spec.name]] = value == Status.ENABLED
+
+    @property
+    def boost(self: Self) -> UpgradeBoostView | None:
+        if not self.spec.boost or not self.colonies.upgrade_boosts[self.row, self.column]:
+            return None
+        return UpgradeBoostView(self.colonies, self.row, self.column, self.spec.boost)
+
+    @boost.setter
+    def boost(self: Self, value: Boost | None) -> None:
+        # Its rate is the cost Producer's, which the next tick works out
+        self.colonies.upgrade_boosts[self.row, self.column] = value is not None
+
+    @property
+    def info(self: Self) -> str:
+        # What `GameState.update_entities` writes once a tick has given the Boost a rate
+        rate = self.colonies.upgrade_boost_rates[self.row, self.column]
+        if not self.spec.boost or isnan(rate):
+            return self.spec.info
+        return style_info(f'[green]⬆[/] {self.spec.boost.target} rate by {round(float(rate), 2)}x for 30s')
+
+    @info.setter
+    def info(self: Self, value: str) -> None:
+        # Worked out from the Boost rate, which is set alongside it
+        pass
+
+    def clone(self: Self) -> Upgrade:
+        boost = self.boost
+        if boost:
+            boost = Boost(cost=boost.cost, target=boost.target, rate=boost.rate, timer=boost.timer)
+        return Upgrade(self.spec, self.info, self.total, self.purchased, self.status, boost)
+
+    def __getitem__(self: Self, producer: ProducerType) -> float:
+        return self.modifiers[producer]
+
+
+class ColonyState(GameState):
+    """
+    A GameState whose records are views into one colony of a Colonies.  `clone` gives a plain, detached GameState.
+
+    Everything but `revision` and the unlock index lives in the arrays.  Don't hold on to one across
+    `Colonies.tick`: the index caches which rules need re-checking, so take a fresh one from `Colonies.colony`.
+    """
+
+    def __init__(self: Self, colonies: Colonies, index: int):
+        self.colonies = colonies
+        self.index = index
+        super().__init__(
+            resources={key: ResourceView(colonies, index, spec) for key, spec in RESOURCE_CATALOG.items()},
+            producers={key: ProducerView(colonies, index, spec) for key, spec in PRODUCER_CATALOG.items()},
+            upgrades={key: UpgradeView(colonies, index, spec) for key, spec in UPGRADE_CATALOG.items()},
+            click_modifier=float(colonies.click_modifiers[index]),
+            effects=ColonyEffects(colonies, index),
+        )
+        if colonies.unlocks is None:
+            colonies.unlocks = UnlockIndex()
+            colonies.unlocks.build(self)
+        # Every rule gets re-checked on the next pass, just as the next `Colonies.tick` would
+        self.unlocks = colonies.unlocks.clone(self)
+        self.unlocks.invalidate()
+        self.refold()
+
+    @property
+    def click_modifier(self: Self) -> float:
+        return float(self.colonies.click_modifiers[self.index])
+
+    @click_modifier.setter
+    def click_modifier(self: Self, value: float) -> None:
+        self.colonies.click_modifiers[self.index] = value
@@ -0,0 +1,36 @@
+"""
+Player input as data, so a frame's worth of it can be handed to `GameState.apply` (and the journal) in one batch.
+"""
+
+from dataclasses import dataclass
+
+from shared import ProducerType, UpgradeType
+
+
+@dataclass(frozen=True, slots=True)
+class Gather:
+    # Presses of the Gather button; held-down keys are merged into one command
+    count: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class BuyProducer:
+    producer: ProducerType
+    # 0 is "buy max"
+    amount: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class BuyUpgrade:
+    upgrade: UpgradeType
+
+
+type Command = Gather | BuyProducer | BuyUpgrade
+
+
+def coalesce(commands: list[Command], command: Command) -> None:
+    """Appends `command` to a batch, folding it into the last one when both are Gathers"""
+    if commands and isinstance(command, Gather) and isinstance(commands[-1], Gather):
+        commands[-1] = Gather(commands[-1].count + command.count)
+    else:
+        commands.append(command)
@@ -0,0 +1,225 @@
+"""
+Loads the game's content (every Resource, Producer and Upgrade) from `content.toml`.
+
+Compiling resolves every name to its enum, styles the info text, and turns each entity's unlock conditions into
+a `Rule` over integer entity IDs.  The compiled catalog is pickled next to this module's bytecode, keyed by a hash
+of the content file, so later startups load it straight from the cache and only recompile after an edit.
+"""
+
+import os
+import pickle
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any
+
+from shared import ResourceType, ProducerType, UpgradeType, Status, style_info
+from shared.constants import Boost, Replace
+from game.unlocks import Rule
+from game.resource import Resource, ResourceSpec
+from game.producer import Producer, ProducerSpec, Product
+from game.upgrade import Upgrade, UpgradeSpec
+
+CONTENT_PATH = os.path.join(os.path.dirname(__file__), 'content.toml')
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '__pycache__')
+# Part of the cache key, so a change to how content is compiled can't load a stale cache
+COMPILER_VERSION = 2
+
+_STATUSES = {'enabled': Status.ENABLED, 'disabled': Status.DISABLED}
+
+
+class ContentError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Content:
+    resources: dict[ResourceType, ResourceSpec]
+    producers: dict[ProducerType, ProducerSpec]
+    upgrades: dict[UpgradeType, UpgradeSpec]
+
+
+class _Compiler:
+    def __init__(self, data: dict[str, Any]):
+        self.data = data
+        self.ids: dict[str, int] = {}
+        sections = (('resources', ResourceType), ('producers', ProducerType), ('upgrades', UpgradeType))
+        for section, enum in sections:
+            entries = data.get(section, {})
+            if set(entries) != set(enum):
+                missing = ', '.join(sorted(set(enum) - set(entries))) or '-'
+                unknown = ', '.join(sorted(set(entries) - set(enum))) or '-'
+                raise ContentError(
+                    f'[{section}] does not match {enum.__name__} (missing: {missing}; unknown: {unknown})'
+                )
+            for name in entries:
+                if name in self.ids:
+                    raise ContentError(f'{name!r} is used for more than one entity')
+                self.ids[name] = len(self.ids)
+
+    def _id(self, name: str) -> int:
+        if name not in self.ids:
+            raise ContentError(f'unknown entity {name!r}')
+        return self.ids[name]
+
+    def _mask(self, names: list[str], only: type | None = None) -> int:
+        mask = 0
+        for name in names:
+            if only and name not in only:
+                raise ContentError(f'{name!r} is not in {only.__name__}')
+            mask |= 1 << self._id(name)
+        return mask
+
+    def rule(self, name: str, entry: dict[str, Any], once: bool = False) -> Rule:
+        unless_bought = self._mask(entry.get('unless_bought', []), UpgradeType)
+        if once:
+            # Upgrades are only ever bought once
+            unless_bought |= 1 << self.ids[name]
+        return Rule(
+            bought=self._mask(entry.get('bought', []), UpgradeType),
+            unless_bought=unless_bought,
+            enabled=self._mask(entry.get('enabled', [])),
+            min_totals=tuple((self._id(key), int(n)) for key, n in entry.get('min_total', {}).items()),
+        )
+
+    @staticmethod
+    def status(entry: dict[str, Any]) -> Status:
+        if entry.get('status', 'disabled') not in _STATUSES:
+            raise ContentError('status has to be "enabled" or "disabled"')
+        return _STATUSES[entry.get('status', 'disabled')]
+
+    @staticmethod
+    def cost(entry: dict[str, Any]) -> dict[ResourceType, int]:
+        return {ResourceType(resource): int(cost) for resource, cost in entry.get('cost', {}).items()}
+
+    def resource(self, name: str, entry: dict[str, Any]) -> ResourceSpec:
+        return ResourceSpec(name=ResourceType(name), status=self.status(entry), rule=self.rule(name, entry))
+
+    def producer(self, name: str, entry: dict[str, Any]) -> ProducerSpec:
+        product = entry['product']
+        return ProducerSpec(
+            name=ProducerType(name),
+            cost=self.cost(entry),
+            product=Product(ResourceType(product['resource']), float(product['rate'])),
+            status=self.status(entry),
+            rule=self.rule(name, entry),
+            replaced=ProducerType(entry['replaced']) if 'replaced' in entry else None,
+        )
+
+    def upgrade(self, name: str, entry: dict[str, Any]) -> UpgradeSpec:
+        boost, replace = entry.get('boost'), entry.get('replace')
+        return UpgradeSpec(
+            name=UpgradeType(name),
+            cost=self.cost(entry),
+            modifiers={
+                key if key == 'CLICK' else ProducerType(key): float(value)
+                for key, value in entry.get('modifiers', {}).items()
+            },
+            # REPLACE infos are written by UpgradeSpec itself, from `replace`
+            info=entry['info'] if entry['info'] == 'REPLACE' else style_info(entry['info']),
+            status=self.status(entry),
+            rule=self.rule(name, entry, once=True),
+            boost=Boost(cost=ProducerType(boost['cost']), target=ProducerType(boost['target'])) if boost else None,
+            replace=Replace(
+                old=ProducerType(replace['old']), created=ProducerType(replace['created']), divisor=replace['divisor']
+            )
+            if replace
+            else None,
+            retires=tuple(self._retired(key) for key in entry.get('retires', [])),
+        )
+
+    @staticmethod
+    def _retired(name: str) -> ResourceType | ProducerType:
+        if name in ResourceType:
+            return ResourceType(name)
+        if name in ProducerType:
+            return ProducerType(name)
+        raise ContentError(f"{name!r} is not a Resource or Producer, so it can't be retired")
+
+    def _check_retires(self, content: Content) -> None:
+        rules = {key: spec.rule for key, spec in (*content.resources.items(), *content.producers.items())}
+        for name, spec in content.upgrades.items():
+            for key in spec.retires:
+                # A retired entity's rule is never checked again, so it has to already keep it disabled
+                if not rules[key].unless_bought >> self.ids[name] & 1:
+                    raise ContentError(f'{name}: retires {key}, so {key} needs unless_bought = ["{name}"]')
+
+    def compile(self) -> Content:
+        sections = []
+        for section, build in (('resources', self.resource), ('producers', self.producer), ('upgrades', self.upgrade)):
+            specs = {}
+            for name, entry in self.data[section].items():
+                try:
+                    spec = build(name, entry)
+                except KeyError as e:
+                    raise ContentError(f'{name}: missing {e}') from None
+                except (ValueError, TypeError) as e:
+                    raise ContentError(f'{name}: {e}') from None
+                specs[spec.name] = spec
+            sections.append(specs)
+        content = Content(*sections)
+        self._check_retires(content)
+        return content
+
+
+def compile_content(data: dict[str, Any]) -> Content:
+    """Compiles parsed content.toml data.  Raises ContentError for anything that doesn't line up with the enums."""
+    return _Compiler(data).compile()
+
+
+def _parse(raw: bytes, path: str) -> dict[str, Any]:
+    # Only needed on a cache miss, so it's imported here rather than on every startup
+    import tomllib
+
+    try:
+        return tomllib.loads(raw.decode())
+    except tomllib.TOMLDecodeError as e:
+        raise ContentError(f'{os.path.basename(path)}: {e}') from None
+
+
+def load_content(path: str = CONTENT_PATH, cache_dir: str | None = CACHE_DIR) -> Content:
+    """The compiled content in `path`, from the cache in `cache_dir` when it's there (None skips the cache)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = sha256(raw + COMPILER_VERSION.to_bytes(4, 'little')).hexdigest()[:16]
+    cache = os.path.join(cache_dir, f'content.{digest}.pickle') if cache_dir else None
+    if cache:
+        try:
+            with open(cache, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # A missing cache, or one that won't load, is just a cache miss
+            pass
+    content = compile_content(_parse(raw, path))
+    if cache:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Written under a temporary name first, so another process never reads half a cache
+            temp = f'{cache}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as f:
+                pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, cache)
+            # Caches of older versions of the file are never read again
+            for name in os.listdir(cache_dir):
+                if name.startswith('content.') and name.endswith('.pickle') and name != os.path.basename(cache):
+                    os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+    return content
+
+
+CONTENT = load_content()
+RESOURCE_CATALOG = CONTENT.resources
+PRODUCER_CATALOG = CONTENT.producers
+UPGRADE_CATALOG = CONTENT.upgrades
+
+
+def new_resources() -> dict[ResourceType, Resource]:
+    return {rtype: Resource.new(spec) for rtype, spec in RESOURCE_CATALOG.items()}
+
+
+def new_producers() -> dict[ProducerType, Producer]:
+    return {ptype: Producer.new(spec) for ptype, spec in PRODUCER_CATALOG.items()}
+
+
+def new_upgrades() -> dict[UpgradeType, Upgrade]:
+    return {utype: Upgrade.new(spec) for utype, spec in UPGRADE_CATALOG.items()}
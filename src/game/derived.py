@@ -0,0 +1,117 @@
+"""
+Values the UI shows that are worked out from the state rather than stored in it: each Producer's effective rate,
+each Resource's income, and how long until every Producer and Upgrade is affordable.
+
+They only move when something production reads changes (a purchase, an Upgrade's modifier, an effect starting or
+running out, a status flip), and every one of those bumps `GameState.revision`, so the cache is checked against
+the revision on each read and otherwise left alone.  When it does move on, only the Producers whose production
+actually changed are recomputed, like the Advisor does.
+
+Waits are kept as the tick each cost will be covered on, rather than a count of ticks, so they stay right as
+production carries on and reading one is a subtraction.  Gathering is the one thing that moves a total without
+touching the revision, so `GameState.gather` tells the cache which Resource moved.
+"""
+
+from math import ceil, inf, isfinite
+from typing import Any, Self
+
+from shared import ResourceType, ProducerType, UpgradeType, Status, abbrev_num
+
+type Key = ProducerType | UpgradeType
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        return inf
+
+
+class Derived:
+    def __init__(self: Self):
+        self.revision: int | None = None
+        self.multiplier: float | None = None
+        # Production per tick of each Producer, including its Boost, and how its row shows it
+        self.rates: dict[ProducerType, float] = {}
+        self.rate_texts: dict[ProducerType, str] = {}
+        # Production per tick of each Resource
+        self.income: dict[ResourceType, float] = {}
+        # The tick each Producer's next unit (or each Upgrade) is affordable on; inf if it never will be
+        self.deadlines: dict[Key, float] = {}
+        # Resources whose totals moved since the deadlines were worked out, other than by production
+        self.moved: set[ResourceType] = set()
+        # What each Producer's production was last time, to spot the ones that changed
+        self.production: dict[ProducerType, tuple] = {}
+        # The Producers and Upgrades whose costs include each Resource
+        self.users: dict[ResourceType, set[Key]] = {}
+
+    def _build(self: Self, state: Any) -> None:
+        self.income = {rtype: 0.0 for rtype in state.resources}
+        self.users = {rtype: set() for rtype in state.resources}
+        for key, entity in (*state.producers.items(), *state.upgrades.items()):
+            for rtype in entity.cost:
+                self.users[rtype].add(key)
+
+    def _deadline(self: Self, state: Any, key: Key) -> float:
+        if key in state.upgrades:
+            entity = state.upgrades[key]
+            if entity.purchased or entity.boost:
+                return inf
+        else:
+            entity = state.producers[key]
+        wait = 0
+        for rtype, cost in entity.cost.items():
+            resource = state.resources[rtype]
+            short = _float(cost) - _float(resource.total) - resource.progress
+            if short <= 0:
+                continue
+            ticks = short / self.income[rtype] if self.income[rtype] > 0 else inf
+            if not isfinite(ticks):
+                return inf
+            wait = max(wait, ceil(ticks))
+        return state.ticks + wait
+
+    def refresh(self: Self, state: Any) -> Self:
+        """Brings everything up to date with `state`.  Free when nothing changed since last time."""
+        if state.revision == self.revision and state.DEBUG_MULTIPLIER == self.multiplier:
+            if self.moved:
+                for key in set().union(*(self.users[rtype] for rtype in self.moved)):
+                    self.deadlines[key] = self._deadline(state, key)
+                self.moved.clear()
+            return self
+        if not self.users:
+            self._build(state)
+        if state.DEBUG_MULTIPLIER != self.multiplier:
+            self.production.clear()
+        self.revision, self.multiplier = state.revision, state.DEBUG_MULTIPLIER
+        resources: set[ResourceType] = set()
+        boosts = state.boosts()
+        for ptype, producer in state.producers.items():
+            boost = boosts.get(ptype, 1.0)
+            seen = (producer.total, producer.product.rate, boost, producer.status)
+            if self.production.get(ptype) == seen:
+                continue
+            self.production[ptype] = seen
+            if producer.status == Status.ENABLED:
+                self.rates[ptype] = producer.product.rate * boost * producer.total * state.DEBUG_MULTIPLIER
+            else:
+                self.rates[ptype] = 0.0
+            # What a tick actually makes, so the row agrees with the totals and the waits
+            self.rate_texts[ptype] = f'[i]{abbrev_num(self.rates[ptype])} {producer.product.resource}/s[/i]'
+            resources.add(producer.product.resource)
+        for rtype in resources:
+            self.income[rtype] = sum(
+                self.rates[ptype] for ptype, p in state.producers.items() if p.product.resource == rtype
+            )
+        # Purchases spend, and costs move with them, so every deadline is worked out again
+        for key in (*state.live.producers, *state.live.upgrades):
+            self.deadlines[key] = self._deadline(state, key)
+        self.moved.clear()
+        return self
+
+    def eta(self: Self, key: Key, now: int) -> int | None:
+        """Ticks from `now` until `key` is affordable: 0 if it already is, None if it never will be at this income"""
+        deadline = self.deadlines.get(key, inf)
+        if deadline == inf:
+            return None
+        return max(0, deadline - now)
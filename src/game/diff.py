@@ -0,0 +1,94 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from shared import ResourceType, ProducerType, UpgradeType, Status
+from shared.conversion import format_duration
+from game.thresholds import AffordabilityIndex
+
+type EntityType = ResourceType | ProducerType | UpgradeType
+
+
+@dataclass
+class StateDiff:
+    """Everything that changed about the displayed state since the last `DiffTracker.diff`"""
+
+    totals: dict[EntityType, int] = field(default_factory=dict)
+    statuses: dict[EntityType, Status] = field(default_factory=dict)
+    # Whether each cost Resource is covered, in the same order as the cost dict
+    affordable: dict[EntityType, tuple[bool, ...]] = field(default_factory=dict)
+    costs: set[EntityType] = field(default_factory=set)
+    # The wait until affordable, as shown ('' when there's none to show)
+    etas: dict[EntityType, str] = field(default_factory=dict)
+    rates: set[ProducerType] = field(default_factory=set)
+    infos: set[UpgradeType] = field(default_factory=set)
+    # Folded away since the last diff; their rows should go
+    retired: set[EntityType] = field(default_factory=set)
+
+    @property
+    def keys(self) -> set[EntityType]:
+        return {*self.totals, *self.statuses, *self.affordable, *self.costs, *self.etas, *self.rates, *self.infos}
+
+
+def _cost_key(entity: Any) -> tuple:
+    boost = getattr(entity, 'boost', None)
+    return tuple(entity.cost.items()), boost.cost if boost else None
+
+
+class DiffTracker:
+    """Remembers the last values handed to the UI, so each frame only touches rows that actually changed"""
+
+    def __init__(self):
+        self.seen: dict[tuple[str, EntityType], Any] = {}
+        # Which costs are covered, updated by the thresholds crossed since the last frame
+        self.thresholds = AffordabilityIndex()
+        self.revision: int | None = None
+        self.retired: set[EntityType] = set()
+
+    def _changed(self, kind: str, key: EntityType, value: Any) -> bool:
+        if self.seen.get((kind, key), self) == value:
+            return False
+        self.seen[(kind, key)] = value
+        return True
+
+    def _costs(self, state: Any, key: EntityType, entity: Any, diff: StateDiff, bought: bool) -> None:
+        # Costs only change when something's bought
+        if bought and self._changed('cost', key, _cost_key(entity)):
+            diff.costs.add(key)
+        # Compared as shown, so a wait of hours only touches the row once a minute
+        eta = state.derived.eta(key, state.ticks)
+        shown = format_duration(eta) if eta else ''
+        if self._changed('eta', key, shown):
+            diff.etas[key] = shown
+
+    def diff(self, state: Any, resource_totals: dict[ResourceType, Any] | None = None) -> StateDiff:
+        """`resource_totals` replaces the Resource totals shown, like the in-between values of `projected_totals`"""
+        diff = StateDiff()
+        resource_totals = resource_totals or {}
+        state.derived.refresh(state)
+        bought = state.revision != self.revision
+        self.revision = state.revision
+        if bought and state.retired != self.retired:
+            diff.retired = state.retired - self.retired
+            self.retired = set(state.retired)
+        live = state.live
+        for key in self.thresholds.update(state):
+            covered = self.thresholds.covered(key)
+            if self._changed('affordable', key, covered):
+                diff.affordable[key] = covered
+        for records in (live.resources, live.producers, live.upgrades):
+            for key, entity in records.items():
+                total = resource_totals.get(key, entity.total)
+                if self._changed('total', key, total):
+                    diff.totals[key] = total
+                if self._changed('status', key, entity.status):
+                    diff.statuses[key] = entity.status
+        for key, producer in live.producers.items():
+            self._costs(state, key, producer, diff, bought)
+            rate = (producer.product.rate, producer.total, state.boost(key) if state.boosted(key) else None)
+            if self._changed('rate', key, rate):
+                diff.rates.add(key)
+        for key, upgrade in live.upgrades.items():
+            self._costs(state, key, upgrade, diff, bought)
+            if self._changed('info', key, upgrade.info):
+                diff.infos.add(key)
+        return diff
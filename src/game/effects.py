@@ -0,0 +1,244 @@
+"""
+Timed effects: temporary multipliers on a Producer, on everything that makes a Resource, or on "Gather" clicks.
+
+Any number of effects can be running at once, and effects on the same target stack (their multipliers are
+multiplied together).  Each target's combined multiplier is cached, and only worked out again when one of its
+effects starts or runs out, so production reads it with a dict lookup.  `changes` counts those updates, for
+callers caching what they work out from the multipliers in turn.
+
+Game time is kept in seconds, as a float, and effects run out to the nearest 1/HZ of a second.  Expiries are
+scheduled on a hierarchical timer wheel: scheduling and cancelling are O(1), and advancing the clock only visits
+the slots that actually hold something, so a fast-forward of an hour with nothing running out costs the same as a
+single tick.  Whatever runs out is handed to every listener, and returned, in the order the effects were added.
+"""
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from math import ceil, floor, prod
+from typing import Any, Self
+
+from shared import ResourceType, ProducerType
+
+type Target = ProducerType | ResourceType | str
+
+# Clock ticks per second.  A power of 2, so every time that's a whole number of ticks is exact as a float.
+HZ = 16
+# The target for effects on the "Gather" button
+CLICK = 'CLICK'
+
+# Each level of the wheel has 2**BITS slots, each covering 2**BITS times as much time as one a level below
+BITS = 6
+SIZE = 1 << BITS
+MASK = SIZE - 1
+
+
+@dataclass(eq=False, slots=True)
+class Effect:
+    target: Target
+    multiplier: float
+    # The game time it runs out at, in seconds
+    expires: float
+    # What started it, like the Upgrade that was bought
+    source: str | None = None
+    # The order effects were added in
+    order: int = 0
+    # The clock tick it runs out on, and where on the wheel it's waiting (None once it's gone)
+    due: int = 0
+    slot: tuple[int, int] | None = field(default=None, repr=False)
+
+
+class TimerWheel:
+    """
+    Entries (anything with `due` and `slot` attributes) waiting for an integer clock to reach their `due` tick.
+
+    An entry goes on the level of the highest group of BITS bits where its `due` differs from `now`, in the slot
+    that group's bits pick.  Everything on a level then shares all the higher groups with `now`, so the lowest
+    occupied slot on each level is the next one that needs looking at, and a bitmask per level finds it at once.
+    When the clock reaches a slot's start its entries move down a level (or, on the lowest level, are due).
+    """
+
+    def __init__(self: Self, now: int = 0):
+        self.now = now
+        # Per level, the occupied slots by index (each an insertion-ordered set), and a bitmask of which those are
+        self.levels: list[dict[int, dict[Any, None]]] = []
+        self.occupied: list[int] = []
+        self.count = 0
+
+    def __len__(self: Self) -> int:
+        return self.count
+
+    def _place(self: Self, entry: Any) -> None:
+        level = ((entry.due ^ self.now).bit_length() - 1) // BITS
+        while len(self.levels) <= level:
+            self.levels.append({})
+            self.occupied.append(0)
+        index = entry.due >> (BITS * level) & MASK
+        self.levels[level].setdefault(index, {})[entry] = None
+        self.occupied[level] |= 1 << index
+        entry.slot = (level, index)
+
+    def schedule(self: Self, entry: Any) -> None:
+        """Adds `entry`, which has to be due after `now`"""
+        if entry.due <= self.now:
+            raise ValueError(f'due ({entry.due}) has to be after now ({self.now})')
+        self._place(entry)
+        self.count += 1
+
+    def cancel(self: Self, entry: Any) -> None:
+        level, index = entry.slot
+        slot = self.levels[level][index]
+        del slot[entry]
+        if not slot:
+            del self.levels[level][index]
+            self.occupied[level] &= ~(1 << index)
+        entry.slot = None
+        self.count -= 1
+
+    def _take(self: Self, level: int, index: int) -> list:
+        self.occupied[level] &= ~(1 << index)
+        return list(self.levels[level].pop(index))
+
+    def _next_slot(self: Self) -> int | None:
+        """The tick the next occupied slot starts on"""
+        best = None
+        for level, mask in enumerate(self.occupied):
+            if mask:
+                index = (mask & -mask).bit_length() - 1
+                shift = BITS * level
+                start = self.now >> (shift + BITS) << (shift + BITS) | index << shift
+                best = start if best is None else min(best, start)
+        return best
+
+    def next_due(self: Self) -> int | None:
+        """The earliest tick anything is due on, or None if nothing is waiting"""
+        best = None
+        for level, mask in enumerate(self.occupied):
+            if mask:
+                index = (mask & -mask).bit_length() - 1
+                due = min(entry.due for entry in self.levels[level][index])
+                best = due if best is None else min(best, due)
+        return best
+
+    def advance(self: Self, to: int) -> list:
+        """Moves the clock on to `to`, returning every entry that came due on the way"""
+        due = []
+        while len(due) < self.count and (start := self._next_slot()) <= to:
+            self.now = start
+            # Higher levels first: what moves down from them may belong in a lower slot starting right now
+            for level in range(len(self.levels) - 1, 0, -1):
+                index = start >> (BITS * level) & MASK
+                if self.occupied[level] >> index & 1:
+                    for entry in self._take(level, index):
+                        if entry.due == start:
+                            entry.slot = None
+                            due.append(entry)
+                        else:
+                            self._place(entry)
+            if self.occupied and self.occupied[0] >> (start & MASK) & 1:
+                for entry in self._take(0, start & MASK):
+                    entry.slot = None
+                    due.append(entry)
+        self.count -= len(due)
+        self.now = max(self.now, to)
+        return due
+
+
+class Effects:
+    def __init__(self: Self):
+        # Game time, in seconds
+        self.now = 0.0
+        self.wheel = TimerWheel()
+        # The running effects on each target, in the order they were added, and their combined multipliers
+        self.running: dict[Target, list[Effect]] = {}
+        self.multipliers: dict[Target, float] = {}
+        # Bumped whenever any target's multiplier changes
+        self.changes = 0
+        # Called with each effect that runs out
+        self.listeners: list[Callable[[Effect], None]] = []
+        self.added = 0
+
+    def __iter__(self: Self) -> Iterator[Effect]:
+        """Every running effect, in the order they were added"""
+        return iter(sorted((e for effects in self.running.values() for e in effects), key=lambda e: e.order))
+
+    def __len__(self: Self) -> int:
+        return len(self.wheel)
+
+    def _update(self: Self, target: Target) -> None:
+        self.changes += 1
+        if self.running.get(target):
+            self.multipliers[target] = prod(effect.multiplier for effect in self.running[target])
+        else:
+            self.running.pop(target, None)
+            self.multipliers.pop(target, None)
+
+    def _start(self: Self, effect: Effect) -> Effect:
+        # Anything that would already have run out does on the next `advance`
+        effect.due = max(ceil(effect.expires * HZ), self.wheel.now + 1)
+        self.wheel.schedule(effect)
+        self.running.setdefault(effect.target, []).append(effect)
+        # Multiplying onto the running product matches `prod` over the whole list, bit for bit
+        self.multipliers[effect.target] = self.multipliers.get(effect.target, 1.0) * effect.multiplier
+        self.changes += 1
+        return effect
+
+    def add(self: Self, target: Target, multiplier: float, duration: float, source: str | None = None) -> Effect:
+        """Starts multiplying `target` by `multiplier` for `duration` seconds"""
+        self.added += 1
+        return self._start(Effect(target, multiplier, self.now + duration, source, self.added))
+
+    def cancel(self: Self, effect: Effect) -> None:
+        """Ends `effect` early, without telling the listeners"""
+        if effect.slot is None:
+            return
+        self.wheel.cancel(effect)
+        self.running[effect.target].remove(effect)
+        self._update(effect.target)
+
+    def clear(self: Self) -> None:
+        for effect in list(self):
+            self.cancel(effect)
+
+    def multiplier(self: Self, target: Target) -> float:
+        """Every running effect on `target` multiplied together, or 1.0 if there aren't any"""
+        return self.multipliers.get(target, 1.0)
+
+    def active(self: Self, target: Target) -> bool:
+        return target in self.multipliers
+
+    def on(self: Self, target: Target) -> list[Effect]:
+        return list(self.running.get(target, ()))
+
+    def remaining(self: Self, effect: Effect) -> float:
+        return effect.expires - self.now
+
+    def next_expiry(self: Self) -> float | None:
+        """Seconds until the next effect runs out, or None if nothing is running"""
+        due = self.wheel.next_due()
+        return None if due is None else due / HZ - self.now
+
+    def advance(self: Self, seconds: float) -> list[Effect]:
+        """Moves game time on, ending (and returning) every effect that runs out on the way"""
+        self.now += seconds
+        if not self.wheel.count:
+            # Nothing is running, which is nearly every tick
+            self.wheel.now = max(self.wheel.now, floor(self.now * HZ))
+            return []
+        expired = sorted(self.wheel.advance(floor(self.now * HZ)), key=lambda e: e.order)
+        for effect in expired:
+            self.running[effect.target].remove(effect)
+        for target in {effect.target for effect in expired}:
+            self._update(target)
+        for effect in expired:
+            for listener in self.listeners:
+                listener(effect)
+        return expired
+
+    def clone(self: Self) -> 'Effects':
+        """A copy with the same effects running, but no listeners"""
+        effects = Effects()
+        effects.now, effects.added = self.now, self.added
+        effects.wheel.now = self.wheel.now
+        for effect in self:
+            effects._start(Effect(effect.target, effect.multiplier, effect.expires, effect.source, effect.order))
+        return effects
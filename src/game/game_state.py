@@ -1,82 +1,334 @@
+from collections.abc import Iterable
 from dataclasses import dataclass, field
-from datetime import datetime
-from math import prod
-from typing import Self
+from math import ceil, floor, prod
+from typing import Self, Any
 
-from shared import ResourceType, ProducerType, Status, UpgradeType, abbrev_num, style_info
-from game.resource import Resource, ALL_RESOURCES
-from game.producer import Producer, ALL_PRODUCERS
-from game.upgrade import Upgrade, ALL_UPGRADES
+from shared import ResourceType, ProducerType, Status, UpgradeType, BigNum, style_info
+from shared.metrics import timed
+from game.resource import Resource
+from game.producer import Producer
+from game.upgrade import Upgrade
+from game.content import new_resources, new_producers, new_upgrades
+from game.ladder import ladder_for
+from game.unlocks import UnlockIndex, StatusChange
+from game.commands import Command, Gather, BuyProducer, BuyUpgrade
+from game.registry import REGISTRY, Kind
+from game.derived import Derived
+from game.effects import CLICK, Effects
 
-# Cookie Clicker implemented a .15 increase in cost for each purchase and scales well
-COST_SCALE = 1.15
 BOOST_PER_20 = 0.5
 
 
+@dataclass(frozen=True, slots=True)
+class Live:
+    """The records of a GameState that aren't retired"""
+
+    resources: dict[ResourceType, Resource]
+    producers: dict[ProducerType, Producer]
+    upgrades: dict[UpgradeType, Upgrade]
+
+
 @dataclass
 class GameState:
     # This can be modified to speed the game production up for debugging purposes
     DEBUG_MULTIPLIER = 1.0
 
-    resources: dict[ResourceType, Resource] = field(default_factory=lambda: ALL_RESOURCES)
-    producers: dict[ProducerType, Producer] = field(default_factory=lambda: ALL_PRODUCERS)
-    upgrades: dict[UpgradeType, Upgrade] = field(default_factory=lambda: ALL_UPGRADES)
+    # Only the per-game state lives in these records; what never changes is shared through each one's `spec`
+    resources: dict[ResourceType, Resource] = field(default_factory=new_resources)
+    producers: dict[ProducerType, Producer] = field(default_factory=new_producers)
+    upgrades: dict[UpgradeType, Upgrade] = field(default_factory=new_upgrades)
     click_modifier: float = 1.0
+    # Every timed effect running, like Boosts (see `game.effects`); read through `boost`, `boosted` and `boosts`
+    effects: Effects = field(default_factory=Effects, repr=False, compare=False)
+    # Bumped whenever anything a tick reads from the Producers changes, so anything cached from them knows to reload
+    revision: int = 0
+    # Optional recorder (see `game.stats.StatsRecorder`) sampled every tick and told about every purchase
+    stats: Any = field(default=None, repr=False, compare=False)
+    # Ticks run since this game was created or loaded.  Only the clock `derived` times its waits against, so unsaved.
+    ticks: int = field(default=0, compare=False)
+    # Rates, incomes and waits worked out from the state (see `game.derived`); read through `gather_rate` and `eta`
+    derived: Derived = field(default_factory=Derived, repr=False, compare=False)
+    # The revision Upgrade Boosts last had their rates worked out at.  They follow Producer totals, which only move
+    # when the revision does.
+    boosts_revision: int | None = field(default=None, repr=False, compare=False)
+    # The boosted Producers' multipliers (see `boosts`), and the effects and `effects.changes` they were read at
+    _boosts: tuple[Effects, int, dict[ProducerType, float]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Resources and Producers folded away by the Upgrades bought (see `refold`), and the records still in play
+    retired: set[ResourceType | ProducerType] = field(default_factory=set, repr=False, compare=False)
+    _live: Live | None = field(default=None, init=False, repr=False, compare=False)
+    # Knows what each unlock rule reads, so `update_entities` only re-checks the ones whose inputs changed
+    unlocks: UnlockIndex = field(default_factory=UnlockIndex, repr=False, compare=False)
+
+    def clone(self: Self) -> Self:
+        """
+        An independent copy of this game, for trying things out without touching the original.
+
+        Copies just the per-game records (and the unlock index built from them), so it's linear in the number of
+        entities.  The copy doesn't share this game's `stats`; give it its own if it needs them.
+        """
+        state = GameState(
+            resources={key: resource.clone() for key, resource in self.resources.items()},
+            producers={key: producer.clone() for key, producer in self.producers.items()},
+            upgrades={key: upgrade.clone() for key, upgrade in self.upgrades.items()},
+            click_modifier=self.click_modifier,
+            effects=self.effects.clone(),
+            revision=self.revision,
+            ticks=self.ticks,
+            boosts_revision=self.boosts_revision,
+            retired=set(self.retired),
+        )
+        state.unlocks = self.unlocks.clone(state)
+        return state
+
+    @property
+    def live(self: Self) -> Live:
+        """The records that aren't retired, which is all that ticks and the UI look at"""
+        if self._live is not None:
+            return self._live
+        if not self.retired:
+            self._live = Live(self.resources, self.producers, self.upgrades)
+        else:
+            self._live = Live(
+                {key: r for key, r in self.resources.items() if key not in self.retired},
+                {key: p for key, p in self.producers.items() if key not in self.retired},
+                # Only Resources and Producers get retired
+                self.upgrades,
+            )
+        return self._live
+
+    def refold(self: Self) -> None:
+        """
+        Works `retired` out from the Upgrades bought.  Retired entities stay in the records (saves and the entity
+        order still count them), but they're never ticked or shown, and their unlock rules are never checked again.
+        """
+        self.retired = {key for u in self.upgrades.values() if u.purchased for key in u.spec.retires}
+        self.unlocks.retire(self.retired)
+        self._live = None
+        self.revision += 1
+
+    def retire(self: Self, keys: Iterable[ResourceType | ProducerType]) -> None:
+        """
+        Folds `keys` away for good, as buying an Upgrade that retires them does.  Unlike `refold`, only `keys` are
+        looked at: they're disabled, dropped from `live` and skipped by the unlock index from then on.
+        """
+        keys = [key for key in keys if key not in self.retired]
+        if not keys:
+            return
+        for key in keys:
+            (self.resources[key] if key in self.resources else self.producers[key]).status = Status.DISABLED
+            self.unlocks.touch('status', key)
+        self.retired.update(keys)
+        self.unlocks.retire(keys)
+        if self._live is not None and self._live.resources is self.resources:
+            # Still the records themselves, so the first fold has to make the filtered copies
+            self._live = None
+        elif self._live is not None:
+            for key in keys:
+                self._live.resources.pop(key, None)
+                self._live.producers.pop(key, None)
+        self.revision += 1
 
-    def tick(self) -> None:
-        for producer in self.producers.values():
+    @timed('tick')
+    def tick(self) -> list[StatusChange]:
+        # Nearly every tick has nothing running, so the multipliers aren't even looked up
+        boosts = self.boosts() if len(self.effects) > 0 else None
+        for producer in self.live.producers.values():
             if producer.status != Status.ENABLED:
                 continue
-            boost = 1.0 if not producer.boost else producer.boost.rate
+            boost = boosts.get(producer.name, 1.0) if boosts else 1.0
             produced = prod([producer.product.rate, boost, producer.total, GameState.DEBUG_MULTIPLIER])
             total, progress = divmod(produced, 1)
-            self.resources[producer.product.resource] += Resource(
-                name=producer.product.resource, total=int(total), progress=progress
-            )
-        self.update_entities()
+            self.resources[producer.product.resource].produce(total, progress)
+        self.ticks += 1
+        if self.stats:
+            # Before the statuses move on, so the rates recorded are the ones this tick produced at
+            self.stats.sample(self)
+        return self.update_entities()
+
+    @timed('advance')
+    def advance(self, seconds: int) -> None:
+        """
+        Fast-forwards the game by `seconds` ticks, ending in the same state as calling `tick()` that many times.
+
+        Between events (an effect running out, or any status flipping) production can't change, so each of those
+        stretches is integrated in a single step instead of tick by tick.
+        """
+        remaining = seconds
+        while remaining > 0:
+            # A real tick settles any statuses left stale by purchases made since the last one
+            self.tick()
+            remaining -= 1
+            # The tick an effect runs out on has to be a real one
+            wait = self.effects.next_expiry()
+            span = remaining if wait is None else min(remaining, ceil(wait) - 1)
+            if span <= 0 or not self.unlocks.settled:
+                continue
+            gains = self._gains()
+            start = [(r.total, r.progress) for r in self.resources.values()]
+            checks = self._checks()
+            self._integrate(start, gains, span)
+            if self._checks() != checks:
+                # Something crosses a threshold partway through; find the first tick it happens on
+                # and stop just short of it, so the next real tick performs the flip
+                low, high = 1, span
+                while low < high:
+                    mid = (low + high) // 2
+                    self._integrate(start, gains, mid)
+                    if self._checks() != checks:
+                        high = mid
+                    else:
+                        low = mid + 1
+                span = low - 1
+                self._integrate(start, gains, span)
+            if self.stats and span:
+                self.stats.sample(self, span)
+            self.effects.advance(span)
+            self.ticks += span
+            remaining -= span
+
+    def _gains(self: Self) -> dict[ResourceType, tuple[int, float]]:
+        """The whole units and fractional progress every Resource gains per tick, as `tick()` computes them"""
+        gains = {}
+        boosts = self.boosts() if len(self.effects) > 0 else None
+        for producer in self.live.producers.values():
+            if producer.status != Status.ENABLED:
+                continue
+            boost = boosts.get(producer.name, 1.0) if boosts else 1.0
+            produced = prod([producer.product.rate, boost, producer.total, GameState.DEBUG_MULTIPLIER])
+            total, progress = divmod(produced, 1)
+            old_total, old_progress = gains.get(producer.product.resource, (0, 0.0))
+            gains[producer.product.resource] = (old_total + int(total), old_progress + progress)
+        return gains
+
+    def _integrate(
+        self: Self, start: list[tuple[BigNum, float]], gains: dict[ResourceType, tuple[int, float]], ticks: int
+    ) -> None:
+        """Sets every Resource to where `ticks` ticks of constant `gains` would take it from `start`"""
+        for (rtype, resource), (total, progress) in zip(self.resources.items(), start):
+            gain_total, gain_progress = gains.get(rtype, (0, 0.0))
+            extra, resource.progress = divmod(progress + gain_progress * ticks, 1)
+            resource.total = total + gain_total * ticks + int(extra)
+
+    def projected_totals(self: Self, alpha: float) -> dict[ResourceType, BigNum]:
+        """Resource totals `alpha` (0 to 1) of the way through the next tick, for drawing production between ticks"""
+        gains = self._gains() if alpha else {}
+        totals = {}
+        for rtype, resource in self.live.resources.items():
+            whole, progress = gains.get(rtype, (0, 0.0))
+            totals[rtype] = resource.total + floor(resource.progress + (whole + progress) * alpha)
+        return totals
+
+    def boost(self: Self, ptype: ProducerType) -> float:
+        """What running effects multiply `ptype`'s production by, counting those on the Resource it makes"""
+        producer = self.producers[ptype]
+        return self.effects.multiplier(ptype) * self.effects.multiplier(producer.product.resource)
+
+    def boosted(self: Self, ptype: ProducerType) -> bool:
+        return self.effects.active(ptype) or self.effects.active(self.producers[ptype].product.resource)
+
+    def boosts(self: Self) -> dict[ProducerType, float]:
+        """Every boosted Producer's `boost`, only worked out again once an effect has started or ended"""
+        effects = self.effects
+        if self._boosts is None or self._boosts[0] is not effects or self._boosts[1] != effects.changes:
+            boosts = {ptype: self.boost(ptype) for ptype in self.producers if self.boosted(ptype)}
+            self._boosts = (effects, effects.changes, boosts)
+        return self._boosts[2]
+
+    def _checks(self: Self) -> tuple[bool, ...]:
+        # Only rules reading volatile inputs (like Resource totals) can flip while nothing is being bought
+        return tuple(self.unlocks.passes(i) for i in sorted(self.unlocks.checked))
+
+    def gather(self: Self, count: int = 1) -> None:
+        """`count` presses of the Gather button"""
+        modifier = self.click_modifier * self.effects.multiplier(CLICK)
+        self.resources[ResourceType.FOOD].total += int(1 * self.DEBUG_MULTIPLIER * modifier) * count
+        self.derived.moved.add(ResourceType.FOOD)
+
+    def apply(self: Self, commands: Iterable[Command]) -> list[StatusChange]:
+        """
+        Runs a batch of player commands in order, then settles statuses once for the whole batch instead of
+        leaving them to the next tick.  Returns the statuses that changed.
+        """
+        for command in commands:
+            self.execute(command)
+        return self.update_statuses()
+
+    def execute(self: Self, command: Command) -> None:
+        """Runs a single command, leaving statuses for the next `apply` or tick to settle"""
+        match command:
+            case Gather(count):
+                self.gather(count)
+            case BuyProducer(producer, amount):
+                self.purchase_producer(producer, amount)
+            case BuyUpgrade(upgrade):
+                self.purchase_upgrade(upgrade)
+
+    def record(self, key: ResourceType | ProducerType | UpgradeType) -> Resource | Producer | Upgrade | None:
+        """The record for any entity key (or its name), or None if there's no such entity"""
+        match REGISTRY.kind(key):
+            case Kind.RESOURCE:
+                return self.resources.get(key)
+            case Kind.PRODUCER:
+                return self.producers.get(key)
+            case Kind.UPGRADE:
+                return self.upgrades.get(key)
+        return None
 
     def get_status(self, key_type: ResourceType | ProducerType | UpgradeType) -> Status:
-        match key_type:
-            case t if t in ResourceType:
-                if t not in self.resources:
-                    return Status.DISABLED
-                return self.resources[t].status
-            case t if t in ProducerType:
-                if t not in self.producers:
-                    return Status.DISABLED
-                return self.producers[t].status
-            case t if t in UpgradeType:
-                return self.upgrades[t].status
-        return Status.DISABLED
+        record = self.record(key_type)
+        return record.status if record else Status.DISABLED
 
     def gather_rate(self, key_type: ProducerType) -> str:
-        p = self.producers[key_type]
-        boost_rate = 1.0
-        if p.boost:
-            boost_rate += p.boost.rate
-        gather_txt = f'[i]{abbrev_num(p.product.rate * p.total * boost_rate)} {p.product.resource}/s[/i]'
-        return gather_txt
+        return self.derived.refresh(self).rate_texts[key_type]
+
+    def eta(self, key_type: ProducerType | UpgradeType) -> int | None:
+        """Ticks until the next one is affordable at the current income: 0 if it already is, None if never"""
+        return self.derived.refresh(self).eta(key_type, self.ticks)
+
+    def producer_cost(self, producer: ProducerType, amount: int = 1) -> dict[ResourceType, BigNum]:
+        """The combined cost of the next `amount` purchases of a Producer"""
+        out = {}
+        for resource, cost in self.producers[producer].cost.items():
+            ladder, pos = ladder_for(cost)
+            out[resource] = ladder.total(pos, amount)
+        return out
+
+    def affordable(self, producer: ProducerType) -> int:
+        """How many of a Producer can be bought right now, accounting for the cost scaling between purchases"""
+        counts = []
+        for resource, cost in self.producers[producer].cost.items():
+            if not cost:
+                continue
+            ladder, pos = ladder_for(cost)
+            counts.append(ladder.affordable(pos, self.resources[resource].total))
+        return min(counts, default=0)
 
     def purchase_producer(self, producer: ProducerType, amount: int, spend: bool = True) -> None:
-        purchased = 0
-        # We must loop here to allow cost to scale in between purchases of more than 1 producer
-        while True:
-            new_cost = self.producers[producer].cost
-            if spend and not all(self.resources[r].total >= c for r, c in new_cost.items()):
-                # Can't afford it with one or more resources
-                break
-            for resource, cost in new_cost.items():
-                if spend:
-                    self.resources[resource].total -= cost
-                new_cost[resource] = int(round(cost * COST_SCALE))
-            self.producers[producer].total += 1
-            self.producers[producer].cost = new_cost
-            purchased += 1
-            # If amount is 0, we're 'buying MAX' and we should keep going until we can't afford more
-            if amount > 0 and purchased == amount:
-                break
+        # If amount is 0, we're 'buying MAX' and we should buy as many as we can afford
+        if spend:
+            affordable = self.affordable(producer)
+            amount = affordable if amount == 0 else min(amount, affordable)
+        if amount <= 0:
+            return
+        new_cost = {}
+        for resource, cost in self.producers[producer].cost.items():
+            ladder, pos = ladder_for(cost)
+            if spend:
+                self.resources[resource].total -= ladder.total(pos, amount)
+            new_cost[resource] = ladder.cost_at(pos + amount)
+        self.producers[producer].total += amount
+        self.producers[producer].cost = new_cost
+        self.revision += 1
+        self.unlocks.touch('total', producer)
+        if self.stats:
+            self.stats.event(producer, amount)
 
     def purchase_upgrade(self, upgrade: UpgradeType) -> None:
+        # Commands and journal replays get here without going through the UI, so nothing else stops a second buy
+        if self.upgrades[upgrade].purchased or self.upgrades[upgrade].status != Status.ENABLED:
+            return
         if not all(self.resources[r].total >= c for r, c in self.upgrades[upgrade].cost.items()):
             # Can't afford it with one or more resources
             return
@@ -84,50 +336,55 @@ class GameState:
             self.resources[resource].total -= cost
         self.upgrades[upgrade].total = 1
         self.upgrades[upgrade].purchased = True
+        self.revision += 1
+        self.unlocks.touch('purchased', upgrade)
+        if self.stats:
+            self.stats.event(upgrade)
         for producer, modifier in self.upgrades[upgrade].modifiers.items():
             if producer == 'CLICK':
                 self.click_modifier *= modifier
                 continue
             self.producers[producer].product.rate *= modifier
         if boost := self.upgrades[upgrade].boost:
-            self.producers[boost.target].boost = boost
             old_producer = self.producers[boost.cost]
             self.producers[boost.cost].status = Status.DISABLED
-            self.producers[boost.target].boost.rate = old_producer.total / 20 * BOOST_PER_20
+            # Runs for the tick it's bought on plus `timer` more, as it always has
+            self.effects.add(boost.target, old_producer.total / 20 * BOOST_PER_20, boost.timer + 1, source=upgrade)
             self.resources[old_producer.product.resource].status = Status.DISABLED
+            self.unlocks.touch('status', boost.cost)
+            self.unlocks.touch('status', old_producer.product.resource)
             self.upgrades[upgrade].boost = None
         if replace := self.upgrades[upgrade].replace:
-            replace.created = replace.created
             self.resources[self.producers[replace.created].product.resource].status = Status.DISABLED
             self.producers[replace.old].status = Status.DISABLED
+            self.unlocks.touch('status', self.producers[replace.created].product.resource)
+            self.unlocks.touch('status', replace.old)
             new_total = round(self.producers[replace.old].total / replace.divisor)
             # This will simulate purchasing the new producer, updating totals, rates, and costs
             self.purchase_producer(replace.created, new_total, spend=False)
-        if all(u.purchased for u in self.upgrades.values()):
-            self.write_stats()
-
-    def write_stats(self: Self) -> None:
-        with open('stats.txt', 'a') as f:
-            f.write(f'\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}:\n')
-            for rtype, resource in self.resources.items():
-                f.write(f'  {rtype}: {resource.total}\n')
-            for ptype, producer in self.producers.items():
-                f.write(f'  {ptype}: {producer.total}\n')
-            f.write('-> CHANGES: \n')
-
-    def update_entities(self: Self) -> None:
+        if retires := self.upgrades[upgrade].spec.retires:
+            # Their counts went into the Boost or the replacement Producer above, so they're done with for good
+            self.retire(retires)
+
+    def update_statuses(self: Self) -> list[StatusChange]:
+        """Re-checks the unlock rules whose inputs changed.  Unlike `update_entities`, no time passes."""
+        changes = self.unlocks.update(self)
+        if any(change.key in self.producers for change in changes):
+            self.revision += 1
+        return changes
+
+    @timed('update_entities')
+    def update_entities(self: Self) -> list[StatusChange]:
         # TODO:  [FUTURE]:  Some animation or effect to show new entities being revealed!
-        for rtype, resource in self.resources.items():
-            self.resources[rtype].status = Status.from_bool(resource.check_fn(self))
-        for ptype, producer in self.producers.items():
-            self.producers[ptype].status = Status.from_bool(producer.check_fn(self))
-            if producer.boost:
-                producer.boost.timer -= 1
-                if producer.boost.timer < 0:
-                    self.producers[ptype].boost = None
-        for utype, upgrade in self.upgrades.items():
-            upgrade.status = Status.from_bool(upgrade.check_fn(self))
-            if boost := upgrade.boost:
-                new_rate = round(1.0 + (self.producers[boost.cost].total / 20 * BOOST_PER_20), 2)
-                self.upgrades[utype].boost.rate = new_rate
-                self.upgrades[utype].info = style_info(f'[green]⬆[/] {boost.target} rate by {new_rate}x for 30s')
+        changes = self.update_statuses()
+        if self.effects.advance(1.0):
+            self.revision += 1
+        # An unbought Boost's rate follows its cost Producer's total, which only moves with the revision
+        if self.boosts_revision != self.revision:
+            self.boosts_revision = self.revision
+            for upgrade in self.upgrades.values():
+                if boost := upgrade.boost:
+                    rate = round(1.0 + (self.producers[boost.cost].total / 20 * BOOST_PER_20), 2)
+                    boost.rate = rate
+                    upgrade.info = style_info(f'[green]⬆[/] {boost.target} rate by {rate}x for 30s')
+        return changes
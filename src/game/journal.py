@@ -0,0 +1,303 @@
+"""
+An append-only journal of everything the player does, for replaying sessions without the TUI.
+
+Every state-changing action is written with the tick it happened on: Gather clicks, Producer and Upgrade
+purchases, and the ticks themselves (runs of ticks with nothing in between are merged into one record).
+Actions applied together through `GameState.apply` are followed by a BATCH marker, so the replay settles
+statuses at the same points the game did.
+Every KEYFRAME_TICKS ticks, and whenever a session starts, the whole state is written as a keyframe in the
+save format, so a replay can start from the nearest keyframe instead of from the beginning of the file.
+
+Replay a journal from `src/`:
+
+    python -m game.journal idle-ant.journal                 # replay all of it, print the final totals
+    python -m game.journal idle-ant.journal --seek 3600     # the state right after tick 3600
+    python -m game.journal idle-ant.journal --verify        # check each keyframe against the replayed state
+
+The replay assumes the same content tables and DEBUG_MULTIPLIER the session was played with.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+from bisect import bisect_right
+from time import perf_counter
+from typing import Self
+
+from shared import ProducerType, UpgradeType
+from game.commands import Command, Gather, BuyProducer, BuyUpgrade
+from game.game_state import GameState
+from game.save import dumps, loads
+from game.sim import new_game
+
+JOURNAL_MAGIC = b'ANTJ'
+# Version 2 added BATCH (version 1 journals still replay, one action at a time), and version 3 a press count to
+# GATHER (older ones were one record per press)
+JOURNAL_VERSION = 3
+JOURNAL_PATH = 'idle-ant.journal'
+KEYFRAME_TICKS = 300
+
+TICKS, GATHER, PRODUCER, UPGRADE, KEYFRAME, BATCH = range(6)
+
+_HEADER = struct.Struct('<4sB')
+_OP = struct.Struct('<B')
+# The payload following each opcode
+_PAYLOADS = {
+    TICKS: struct.Struct('<I'),
+    # How many presses
+    GATHER: struct.Struct('<H'),
+    PRODUCER: struct.Struct('<BI'),
+    UPGRADE: struct.Struct('<B'),
+    # Tick number and length of the save data that follows
+    KEYFRAME: struct.Struct('<II'),
+    BATCH: struct.Struct('<'),
+}
+
+# Before version 3, GATHER had no payload
+_OLD_PAYLOADS = _PAYLOADS | {GATHER: struct.Struct('<')}
+# The most presses one GATHER record holds
+_GATHER_MAX = 0xFFFF
+
+_PRODUCERS = list(ProducerType)
+_UPGRADES = list(UpgradeType)
+_PRODUCER_INDEX = {p: i for i, p in enumerate(_PRODUCERS)}
+_UPGRADE_INDEX = {u: i for i, u in enumerate(_UPGRADES)}
+
+type Event = tuple[int, int, tuple]
+
+
+class JournalError(ValueError):
+    pass
+
+
+def parse(data: bytes) -> tuple[list[Event], int]:
+    """
+    Splits journal data into (tick, opcode, payload) events.  A KEYFRAME's payload is its save data.
+
+    Also returns how many bytes were read; a record cut short by a crash ends the journal there.
+    """
+    if len(data) < _HEADER.size or data[: len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+        raise JournalError('Not an idle-ant journal')
+    _, version = _HEADER.unpack_from(data)
+    if not 1 <= version <= JOURNAL_VERSION:
+        raise JournalError(f'Journal version {version} does not match this game (version {JOURNAL_VERSION})')
+    payloads = _PAYLOADS if version >= 3 else _OLD_PAYLOADS
+    events = []
+    tick = 0
+    offset = _HEADER.size
+    while offset < len(data):
+        op = data[offset]
+        payload_struct = payloads.get(op)
+        end = offset + _OP.size + (payload_struct.size if payload_struct else 0)
+        if payload_struct is None or end > len(data):
+            break
+        payload = payload_struct.unpack_from(data, offset + _OP.size)
+        if op == KEYFRAME:
+            tick, size = payload
+            if end + size > len(data):
+                break
+            payload = (data[end : end + size],)
+            end += size
+        events.append((tick, op, payload))
+        if op == TICKS:
+            tick += payload[0]
+        offset = end
+    return events, offset
+
+
+class Journal:
+    """
+    Writes a journal for a live game.
+
+    Appends to `path` if it already holds a journal, carrying on from its last tick.  Runs of ticks are held back
+    until the next action (or keyframe) so idle stretches cost a single record, and the file is flushed at every
+    keyframe, so a crash loses at most the last few minutes.
+    """
+
+    def __init__(self: Self, path: str, game_state: GameState):
+        self.tick_count = 0
+        self.pending_ticks = 0
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            try:
+                events, size = parse(data)
+                if _HEADER.unpack_from(data)[1] != JOURNAL_VERSION:
+                    # Older records are laid out differently, so new ones can't follow them in the same file
+                    raise JournalError('Journal is from an older version')
+            except JournalError:
+                # Not something we can append to; start over
+                events, size = [], 0
+            if events:
+                last_tick, op, payload = events[-1]
+                self.tick_count = last_tick + (payload[0] if op == TICKS else 0)
+            if size < len(data):
+                # Drop whatever a crash left half-written, so new records don't land after garbage
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+        # The session may start from a save (or from scratch), so its starting state is always recorded first
+        self.keyframe(game_state)
+
+    def _flush_ticks(self: Self) -> None:
+        if self.pending_ticks:
+            self.file.write(_OP.pack(TICKS) + _PAYLOADS[TICKS].pack(self.pending_ticks))
+            self.pending_ticks = 0
+
+    def _write(self: Self, op: int, *payload: int) -> None:
+        self._flush_ticks()
+        self.file.write(_OP.pack(op) + _PAYLOADS[op].pack(*payload))
+
+    def gather(self: Self, count: int = 1) -> None:
+        while count > 0:
+            self._write(GATHER, min(count, _GATHER_MAX))
+            count -= _GATHER_MAX
+
+    def purchase_producer(self: Self, producer: ProducerType, amount: int) -> None:
+        self._write(PRODUCER, _PRODUCER_INDEX[producer], amount)
+
+    def purchase_upgrade(self: Self, upgrade: UpgradeType) -> None:
+        self._write(UPGRADE, _UPGRADE_INDEX[upgrade])
+
+    def apply(self: Self, commands: list[Command]) -> None:
+        """Records a batch of commands that went through `GameState.apply` together"""
+        for command in commands:
+            match command:
+                case Gather(count):
+                    self.gather(count)
+                case BuyProducer(producer, amount):
+                    self.purchase_producer(producer, amount)
+                case BuyUpgrade(upgrade):
+                    self.purchase_upgrade(upgrade)
+        self._write(BATCH)
+
+    @property
+    def ticks_to_keyframe(self: Self) -> int:
+        return KEYFRAME_TICKS - self.tick_count % KEYFRAME_TICKS
+
+    def tick(self: Self, game_state: GameState, count: int = 1) -> None:
+        """
+        Records `count` ticks that `game_state` has just run.  Runs of ticks shouldn't cross a keyframe
+        (see `ticks_to_keyframe`), since the keyframe is only taken at the end of the run.
+        """
+        self.tick_count += count
+        self.pending_ticks += count
+        if self.tick_count % KEYFRAME_TICKS == 0:
+            self.keyframe(game_state)
+
+    def keyframe(self: Self, game_state: GameState) -> None:
+        data = dumps(game_state)
+        self._write(KEYFRAME, self.tick_count, len(data))
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self: Self) -> None:
+        self._flush_ticks()
+        self.file.close()
+
+
+class Replay:
+    """
+    Re-runs a journal headlessly.
+
+    Keyframes are indexed up front, so `seek` only replays from the nearest keyframe at or before the target
+    tick.  Runs of ticks go through `GameState.advance`, which skips through idle stretches in closed form.
+    """
+
+    def __init__(self: Self, data: bytes):
+        self.events, _ = parse(data)
+        self.keyframes = [i for i, (_, op, _) in enumerate(self.events) if op == KEYFRAME]
+        self.keyframe_ticks = [self.events[i][0] for i in self.keyframes]
+        last_tick, op, payload = self.events[-1] if self.events else (0, TICKS, (0,))
+        self.end_tick = last_tick + (payload[0] if op == TICKS else 0)
+
+    @classmethod
+    def open(cls, path: str) -> Self:
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def seek(self: Self, tick: int | None = None, verify: bool = False) -> GameState:
+        """
+        The state right after tick `tick` (or at the end of the journal), before any action taken during the
+        following second.  With `verify`, the replay starts from the first keyframe instead and checks every keyframe
+        it passes against the replayed state.
+        """
+        if not self.keyframes:
+            raise JournalError('Journal has no keyframes to start from')
+        # Past the end, so the actions after the last tick are replayed too
+        target = self.end_tick + 1 if tick is None else min(tick, self.end_tick)
+        # Keyframes are written right after their tick, so the last one at or before the target is the start
+        start = self.keyframes[max(bisect_right(self.keyframe_ticks, target) - 1, 0)]
+        if verify:
+            start = self.keyframes[0]
+        state = new_game()
+        # Actions waiting for their BATCH marker.  Older journals don't have those, so anything still waiting
+        # when the next record comes along is applied one at a time, the way those games were played.
+        batch: list[Command] = []
+        for index in range(start, len(self.events)):
+            at, op, payload = self.events[index]
+            if at >= target and index != start:
+                break
+            if op in (GATHER, PRODUCER, UPGRADE):
+                batch.append(self._command(op, payload))
+                continue
+            if op == BATCH:
+                state.apply(batch)
+                batch = []
+                continue
+            for command in batch:
+                state.execute(command)
+            batch = []
+            if op == TICKS:
+                state.advance(min(payload[0], target - at))
+            elif op == KEYFRAME:
+                if verify and index != start and dumps(state) != payload[0]:
+                    raise JournalError(f'Replay diverged from the journal by tick {at}')
+                loads(payload[0], state)
+        for command in batch:
+            state.execute(command)
+        return state
+
+    @staticmethod
+    def _command(op: int, payload: tuple) -> Command:
+        if op == GATHER:
+            return Gather(*payload)
+        if op == PRODUCER:
+            return BuyProducer(_PRODUCERS[payload[0]], payload[1])
+        return BuyUpgrade(_UPGRADES[payload[0]])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m game.journal', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', nargs='?', default=JOURNAL_PATH)
+    parser.add_argument('--seek', type=int, default=None, help='Stop right after this tick (default: the end)')
+    parser.add_argument('--verify', action='store_true', help='Check the replay against every keyframe')
+    args = parser.parse_args(argv)
+
+    started = perf_counter()
+    try:
+        replay = Replay.open(args.path)
+        state = replay.seek(args.seek, verify=args.verify)
+    except JournalError as e:
+        sys.exit(str(e))
+    elapsed = perf_counter() - started
+    tick = replay.end_tick if args.seek is None else min(args.seek, replay.end_tick)
+    print(
+        json.dumps(
+            {
+                'tick': tick,
+                'resources': {str(r): int(v.total) for r, v in state.resources.items()},
+                'producers': {str(p): v.total for p, v in state.producers.items()},
+                'upgrades': [str(u) for u, v in state.upgrades.items() if v.purchased],
+            }
+        )
+    )
+    print(f'Replayed to tick {tick} of {replay.end_tick} in {elapsed:.2f}s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+from bisect import bisect_right
+
+from shared import BigNum
+
+# Cookie Clicker implemented a .15 increase in cost for each purchase and scales well
+COST_SCALE = 1.15
+
+
+class CostLadder:
+    """
+    The sequence of costs a single resource climbs through as a Producer is purchased.
+
+    Each step is `round(cost * COST_SCALE)` of the previous one, exactly as the game has always
+    rounded, so the ladder can't be solved as a pure geometric series.  Instead the steps and their
+    running sums are memoized and extended lazily, which lets us answer "how much do N more cost?"
+    and "how many can I afford?" with a lookup and a binary search.
+    """
+
+    def __init__(self, base: int | BigNum):
+        base = BigNum(base)
+        self.costs: list[BigNum] = [base]
+        # sums[i] is the total cost of the first i steps of the ladder
+        self.sums: list[BigNum] = [BigNum(), base]
+        # Small costs (0-3) round back to themselves, after which the ladder never climbs again
+        self.flat = False
+
+    def _extend(self) -> None:
+        last = self.costs[-1]
+        step = round(last * COST_SCALE)
+        if step == last:
+            self.flat = True
+            return
+        self.costs.append(step)
+        self.sums.append(self.sums[-1] + step)
+        _INDEX.setdefault(step, (self, len(self.costs) - 1))
+
+    def cost_at(self, pos: int) -> BigNum:
+        while pos >= len(self.costs) and not self.flat:
+            self._extend()
+        return self.costs[min(pos, len(self.costs) - 1)]
+
+    def total(self, pos: int, amount: int) -> BigNum:
+        """The combined cost of buying `amount` steps starting at `pos`"""
+        end = pos + amount
+        while end >= len(self.sums) and not self.flat:
+            self._extend()
+        if end < len(self.sums):
+            return self.sums[end] - self.sums[pos]
+        return self.sums[-1] - self.sums[pos] + (end - len(self.sums) + 1) * self.costs[-1]
+
+    def affordable(self, pos: int, budget: int | BigNum) -> int:
+        """The largest number of steps starting at `pos` whose combined cost fits in `budget`"""
+        target = self.sums[pos] + budget
+        while self.sums[-1] <= target and not self.flat:
+            self._extend()
+        if self.sums[-1] <= target:
+            # Once flat, every extra step costs the same so the remainder is a single division
+            last = self.costs[-1]
+            extra = int((target - self.sums[-1]) // last) if last else 0
+            return len(self.sums) - 1 - pos + extra
+        return bisect_right(self.sums, target, lo=pos) - 1 - pos
+
+
+# Every cost value we've seen, mapped to the ladder (and position) that contains it.  Because each step
+# only depends on the previous value, any ladder passing through a value continues identically from there.
+_INDEX: dict[BigNum, tuple[CostLadder, int]] = {}
+
+
+def ladder_for(cost: int | BigNum) -> tuple[CostLadder, int]:
+    """Returns the memoized ladder containing `cost`, and the position of `cost` on it"""
+    if cost not in _INDEX:
+        _INDEX[cost] = (CostLadder(cost), 0)
+    return _INDEX[cost]
@@ -1,17 +1,34 @@
 from dataclasses import dataclass
-from typing import Callable, Any
+from typing import Self
 
-from shared import ResourceType, ProducerType, Status, UpgradeType
-from shared.constants import Boost
+from shared import ResourceType, ProducerType, Status, BigNum
+from game.unlocks import Rule
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     resource: ResourceType
     rate: float
 
 
-@dataclass
+@dataclass(frozen=True, eq=False)
+class ProducerSpec:
+    """The parts of a Producer that never change during a game, shared by every GameState"""
+
+    name: ProducerType
+    # The cost of the first one; see `game.ladder` for how it climbs
+    cost: dict[ResourceType, int]
+    # What it makes, at its base rate
+    product: Product
+    # The status a new game starts with
+    status: Status = Status.DISABLED
+    # When status should be enabled, compiled from content.toml
+    rule: Rule = Rule()
+    # This is which Producer got replaced by this one
+    replaced: ProducerType | None = None
+
+
+@dataclass(slots=True)
 class Producer:
     """
     A base 'producer' type, which can produce resources at given rates.
@@ -20,66 +37,31 @@ class Producer:
     from modifiers due to other factors.
     """
 
-    name: ProducerType
-    cost: dict[ResourceType, int]
+    spec: ProducerSpec
+    # The cost of the next one
+    cost: dict[ResourceType, BigNum]
     product: Product
     total: int = 0
     status: Status = Status.DISABLED
-    # A function that returns whether status should be enabled
-    # "Any" here is actually GameState, but we can't import it here due to circular imports
-    check_fn: Callable[[Any], bool] = lambda _: True
-    # If this is set, it means the boost is ACTIVE and should count down.
-    boost: Boost | None = None
-    # This is which Producer got replaced by this one
-    replaced: ProducerType | None = None
 
+    @classmethod
+    def new(cls, spec: ProducerSpec) -> Self:
+        cost = {resource: BigNum(cost) for resource, cost in spec.cost.items()}
+        return cls(spec, cost, Product(spec.product.resource, spec.product.rate), status=spec.status)
+
+    def clone(self) -> Self:
+        return Producer(
+            self.spec,
+            dict(self.cost),
+            Product(self.product.resource, self.product.rate),
+            self.total,
+            self.status,
+        )
+
+    @property
+    def name(self) -> ProducerType:
+        return self.spec.name
 
-ALL_PRODUCERS = {
-    ProducerType.ANT: Producer(
-        name=ProducerType.ANT,
-        status=Status.ENABLED,
-        cost={ResourceType.FOOD: 5},
-        product=Product(resource=ResourceType.FOOD, rate=0.5),
-        check_fn=lambda state: not state.upgrades[UpgradeType.INDUSTRIAL_FARMING].purchased,
-    ),
-    ProducerType.WORKER: Producer(
-        name=ProducerType.WORKER,
-        cost={ResourceType.FOOD: 25},
-        product=Product(resource=ResourceType.STICKS, rate=0.5),
-        check_fn=lambda state: state.upgrades[UpgradeType.FIRST_QUEEN].purchased
-        and not state.upgrades[UpgradeType.TREE_FARMING].purchased,
-    ),
-    ProducerType.HAULER: Producer(
-        name=ProducerType.HAULER,
-        cost={ResourceType.FOOD: 500, ResourceType.STICKS: 200},
-        product=Product(resource=ResourceType.STONES, rate=0.5),
-        check_fn=lambda state: state.resources[ResourceType.STICKS].status == Status.ENABLED,
-    ),
-    ProducerType.SOLDIER: Producer(
-        name=ProducerType.SOLDIER,
-        cost={ResourceType.FOOD: 800, ResourceType.STICKS: 500, ResourceType.STONES: 100},
-        product=Product(resource=ResourceType.LAND, rate=1.5),
-        check_fn=lambda state: state.upgrades[UpgradeType.CLUB].purchased,
-    ),
-    ProducerType.MINER: Producer(
-        name=ProducerType.MINER,
-        cost={ResourceType.FOOD: 2000, ResourceType.STICKS: 600, ResourceType.STONES: 300},
-        product=Product(resource=ResourceType.METAL, rate=3),
-        check_fn=lambda state: state.upgrades[UpgradeType.MINING].purchased,
-    ),
-    ProducerType.ENGINEER: Producer(
-        name=ProducerType.ENGINEER,
-        cost={ResourceType.LAND: 200, ResourceType.METAL: 100},
-        product=Product(resource=ResourceType.ENERGY, rate=3),
-        check_fn=lambda state: state.upgrades[UpgradeType.INDUSTRIAL_REVOLUTION].purchased,
-    ),
-    # FOOD IS NO LONGER A RESOURCE BY THIS POINT
-    # STICKS ARE NO LONGER A RESOURCE BY THIS POINT
-    ProducerType.LUMBERJACK: Producer(
-        name=ProducerType.LUMBERJACK,
-        cost={ResourceType.METAL: 200, ResourceType.ENERGY: 100},
-        product=Product(resource=ResourceType.LUMBER, rate=3),  # Rate will be auto-calculated on unlock
-        check_fn=lambda state: state.upgrades[UpgradeType.TREE_FARMING].purchased,
-        replaced=ProducerType.WORKER,
-    ),
-}
+    @property
+    def replaced(self) -> ProducerType | None:
+        return self.spec.replaced
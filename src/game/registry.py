@@ -0,0 +1,81 @@
+"""
+Every entity's handle: a dense integer ID, its position in the game's entity order (Resources, then Producers,
+then Upgrades), the same IDs the unlock rules are compiled against.
+
+The registry is built once from the compiled content, so finding out what kind of entity a key is, or which
+entity (and command) a widget ID stands for, is a dict lookup rather than trying each enum in turn.  Keys are
+StrEnums, which hash and compare like their names, so plain names (from JSON, or a widget) look up the same way.
+"""
+
+from dataclasses import dataclass
+from enum import Enum, auto
+
+from shared import ResourceType, ProducerType, UpgradeType, type_class
+from game.commands import Command, Gather, BuyProducer, BuyUpgrade
+from game.content import RESOURCE_CATALOG, PRODUCER_CATALOG, UPGRADE_CATALOG
+
+type EntityType = ResourceType | ProducerType | UpgradeType
+
+
+class Kind(Enum):
+    RESOURCE = auto()
+    PRODUCER = auto()
+    UPGRADE = auto()
+
+
+@dataclass(frozen=True, slots=True)
+class Registry:
+    # Indexed by handle
+    keys: tuple[EntityType, ...]
+    kinds: tuple[Kind, ...]
+    # Key (or name) to handle, and the `type_class` prefix of a widget ID to handle
+    handles: dict[str, int]
+    widget_ids: dict[str, int]
+
+    @classmethod
+    def build(cls, *sections: tuple[Kind, list[EntityType]]) -> 'Registry':
+        keys, kinds = [], []
+        for kind, members in sections:
+            keys.extend(members)
+            kinds.extend([kind] * len(members))
+        return cls(
+            keys=tuple(keys),
+            kinds=tuple(kinds),
+            handles={key: handle for handle, key in enumerate(keys)},
+            widget_ids={type_class(key): handle for handle, key in enumerate(keys)},
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def handle(self, key: str) -> int | None:
+        return self.handles.get(key)
+
+    def kind(self, key: str) -> Kind | None:
+        handle = self.handles.get(key)
+        return None if handle is None else self.kinds[handle]
+
+    def route(self, widget_id: str) -> Command | None:
+        """
+        The command a button with this ID stands for (see `widgets.rows`), or None if it isn't a game button.
+        This parses the ID, so callers build their routes once instead of calling it on every press.
+        """
+        if widget_id == 'gather':
+            return Gather()
+        prefix, _, suffix = widget_id.rpartition('-')
+        handle = self.widget_ids.get(prefix)
+        if handle is None:
+            return None
+        match self.kinds[handle]:
+            case Kind.PRODUCER if suffix.isdigit():
+                return BuyProducer(self.keys[handle], int(suffix))
+            case Kind.UPGRADE if suffix == 'upgrade':
+                return BuyUpgrade(self.keys[handle])
+        return None
+
+
+REGISTRY = Registry.build(
+    (Kind.RESOURCE, list(RESOURCE_CATALOG)),
+    (Kind.PRODUCER, list(PRODUCER_CATALOG)),
+    (Kind.UPGRADE, list(UPGRADE_CATALOG)),
+)
@@ -1,62 +1,53 @@
 from dataclasses import dataclass
-from typing import Self, Callable, Any
+from typing import Self
 
-from shared import ResourceType, Status, ProducerType, UpgradeType
+from shared import ResourceType, Status, BigNum
+from game.unlocks import Rule
 
 
-@dataclass
+@dataclass(frozen=True, eq=False)
+class ResourceSpec:
+    """The parts of a Resource that never change during a game, shared by every GameState"""
+
+    name: ResourceType
+    # The status a new game starts with
+    status: Status = Status.DISABLED
+    # When status should be enabled, compiled from content.toml
+    rule: Rule = Rule()
+
+
+@dataclass(slots=True)
 class Resource:
     """A base 'resource' type, which helps calculate progress to a future full value."""
 
-    name: ResourceType
-    total: int = 0
+    spec: ResourceSpec
+    total: BigNum = BigNum()
     progress: float = 0.0
     status: Status = Status.DISABLED
-    # A function that returns whether status should be enabled
-    # "Any" here is actually GameState, but we can't import it here due to circular imports
-    check_fn: Callable[[Any], bool] = lambda _: True
+
+    @classmethod
+    def new(cls, spec: ResourceSpec) -> Self:
+        return cls(spec, status=spec.status)
+
+    def clone(self) -> Self:
+        return Resource(self.spec, self.total, self.progress, self.status)
+
+    @property
+    def name(self) -> ResourceType:
+        return self.spec.name
+
+    def produce(self, total: int | float | BigNum, progress: float) -> None:
+        """Adds whole units and fractional progress, carrying the progress over into the total"""
+        extra, self.progress = divmod(self.progress + progress, 1)
+        self.total += total + extra
 
     def __add__(self, other: Self | float) -> Self:
         if not isinstance(other, float):
-            extra, self.progress = divmod(self.progress + other.progress, 1)
-            self.total += int(other.total + extra)
+            self.produce(other.total, other.progress)
         else:
-            total, self.progress = divmod(self.total + self.progress + other, 1)
-            self.total = int(total)
+            self.total, progress = divmod(self.total + self.progress + other, 1)
+            self.progress = float(progress)
         return self
 
     def __str__(self) -> str:
         return f'{self.name}: {self.total}'
-
-
-ALL_RESOURCES = {
-    ResourceType.FOOD: Resource(
-        name=ResourceType.FOOD,
-        status=Status.ENABLED,
-        check_fn=lambda state: not state.upgrades[UpgradeType.INDUSTRIAL_FARMING].purchased,
-    ),
-    ResourceType.STICKS: Resource(
-        name=ResourceType.STICKS,
-        check_fn=lambda state: state.producers[ProducerType.WORKER].total > 0,
-    ),
-    ResourceType.STONES: Resource(
-        name=ResourceType.STONES,
-        check_fn=lambda state: state.producers[ProducerType.HAULER].total > 0,
-    ),
-    ResourceType.LAND: Resource(
-        name=ResourceType.LAND,
-        check_fn=lambda state: state.producers[ProducerType.SOLDIER].total > 0,
-    ),
-    ResourceType.METAL: Resource(
-        name=ResourceType.METAL,
-        check_fn=lambda state: state.producers[ProducerType.MINER].total > 0,
-    ),
-    ResourceType.ENERGY: Resource(
-        name=ResourceType.ENERGY,
-        check_fn=lambda state: state.producers[ProducerType.ENGINEER].total > 0,
-    ),
-    ResourceType.LUMBER: Resource(
-        name=ResourceType.LUMBER,
-        check_fn=lambda state: state.producers[ProducerType.LUMBERJACK].total > 0,
-    ),
-}
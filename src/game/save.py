@@ -0,0 +1,210 @@
+"""
+Compact binary save files.
+
+Only the dynamic parts of a GameState are written (totals, progress, costs, rates, running effects, purchases,
+statuses and the click modifier); everything else comes from the content tables when loading.  Effects keep the
+time they have left, so one saved halfway through a second still runs out halfway through a second.
+Entities are written in the order `content.toml` lists them (the order of `state.resources`, `state.producers` and
+`state.upgrades`, and of the registry handles effects are saved with), so adding, removing or reordering entries
+there, or changing how many costs a Producer has, needs a new SAVE_VERSION.
+"""
+
+import os
+import struct
+from copy import copy
+import threading
+from typing import Self
+
+from shared import Status, BigNum
+from game.effects import CLICK
+from game.game_state import GameState
+from game.registry import REGISTRY
+
+SAVE_MAGIC = b'ANT'
+SAVE_VERSION = 3
+SAVE_PATH = 'idle-ant.sav'
+
+_HEADER = struct.Struct('<3sBdBBB')
+# BigNums are written as their (mantissa, exponent) pair
+_RESOURCE = struct.Struct('<did')
+_PRODUCER = struct.Struct('<qd')
+_COST = struct.Struct('<di')
+_COUNT = struct.Struct('<H')
+# Target and source are registry handles, -1 for the "Gather" button and for no source
+_EFFECT = struct.Struct('<hddh')
+
+
+class SaveError(ValueError):
+    pass
+
+
+def _pack_bits(flags: list[bool]) -> bytes:
+    value = sum(1 << i for i, flag in enumerate(flags) if flag)
+    return value.to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def _unpack_bits(data: bytes, count: int) -> list[bool]:
+    value = int.from_bytes(data, 'little')
+    return [bool(value >> i & 1) for i in range(count)]
+
+
+def _handle(key: str | None) -> int:
+    return -1 if key is None or key == CLICK else REGISTRY.handles[key]
+
+
+def dumps(state: GameState) -> bytes:
+    resources = list(state.resources.values())
+    producers = list(state.producers.values())
+    upgrades = list(state.upgrades.values())
+    out = [_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, state.click_modifier, len(resources), len(producers), len(upgrades))]
+    for resource in resources:
+        out.append(_RESOURCE.pack(resource.total.mantissa, resource.total.exponent, resource.progress))
+    for producer in producers:
+        out.append(_PRODUCER.pack(producer.total, producer.product.rate))
+        out.extend(_COST.pack(cost.mantissa, cost.exponent) for cost in producer.cost.values())
+    effects = list(state.effects)
+    out.append(_COUNT.pack(len(effects)))
+    for effect in effects:
+        remaining = state.effects.remaining(effect)
+        out.append(_EFFECT.pack(_handle(effect.target), effect.multiplier, remaining, _handle(effect.source)))
+    out.append(_pack_bits([u.purchased for u in upgrades]))
+    out.append(_pack_bits([e.status == Status.ENABLED for e in [*resources, *producers, *upgrades]]))
+    return b''.join(out)
+
+
+def loads(data: bytes, state: GameState | None = None) -> GameState:
+    """Restores a save made by `dumps` onto `state` (a new GameState by default)"""
+    state = state or GameState()
+    try:
+        values = _read(data, state)
+    except struct.error as e:
+        raise SaveError('Save file is truncated or corrupt') from e
+    click_modifier, resources, producers, effects, purchased, enabled = values
+    # Everything is decoded before anything is assigned, so a bad save never leaves a half-loaded game
+    state.click_modifier = click_modifier
+    for resource, (total, progress) in zip(state.resources.values(), resources):
+        resource.total, resource.progress = total, progress
+    for producer, (total, rate, costs) in zip(state.producers.values(), producers):
+        producer.total, producer.product.rate = total, rate
+        producer.cost = dict(zip(producer.cost, costs))
+    state.effects.clear()
+    for target, multiplier, remaining, source in effects:
+        state.effects.add(target, multiplier, remaining, source)
+    for upgrade, bought in zip(state.upgrades.values(), purchased):
+        upgrade.purchased = bought
+        upgrade.total = int(bought)
+        # A bought Boost Upgrade's Boost became a timed effect, which is restored with the others above
+        upgrade.boost = None if bought or not upgrade.spec.boost else copy(upgrade.spec.boost)
+    for entity, flag in zip([*state.resources.values(), *state.producers.values(), *state.upgrades.values()], enabled):
+        entity.status = Status.from_bool(flag)
+    state.refold()
+    state.unlocks.invalidate()
+    return state
+
+
+def _read(data: bytes, state: GameState) -> tuple:
+    magic, version, click_modifier, n_resources, n_producers, n_upgrades = _HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise SaveError('Not an idle-ant save file')
+    if version != SAVE_VERSION or (n_resources, n_producers, n_upgrades) != (
+        len(state.resources),
+        len(state.producers),
+        len(state.upgrades),
+    ):
+        raise SaveError(f'Save file version {version} does not match this game (version {SAVE_VERSION})')
+    offset = _HEADER.size
+    resources = []
+    for _ in range(n_resources):
+        mantissa, exponent, progress = _RESOURCE.unpack_from(data, offset)
+        resources.append((BigNum.from_parts(mantissa, exponent), progress))
+        offset += _RESOURCE.size
+    producers = []
+    for producer in state.producers.values():
+        total, rate = _PRODUCER.unpack_from(data, offset)
+        offset += _PRODUCER.size
+        costs = []
+        for _ in producer.cost:
+            costs.append(BigNum.from_parts(*_COST.unpack_from(data, offset)))
+            offset += _COST.size
+        producers.append((total, rate, costs))
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    effects = []
+    for _ in range(count):
+        target, multiplier, remaining, source = _EFFECT.unpack_from(data, offset)
+        offset += _EFFECT.size
+        if not -1 <= target < len(REGISTRY.keys) or not -1 <= source < len(REGISTRY.keys):
+            raise SaveError('Save file is truncated or corrupt')
+        target_key = REGISTRY.keys[target] if target >= 0 else CLICK
+        effects.append((target_key, multiplier, remaining, REGISTRY.keys[source] if source >= 0 else None))
+    size = (n_upgrades + 7) // 8
+    purchased = _unpack_bits(data[offset : offset + size], n_upgrades)
+    offset += size
+    n_entities = n_resources + n_producers + n_upgrades
+    if len(data) != offset + (n_entities + 7) // 8:
+        raise SaveError('Save file is truncated or corrupt')
+    enabled = _unpack_bits(data[offset:], n_entities)
+    return click_modifier, resources, producers, effects, purchased, enabled
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Writes to a temporary file and renames it over `path`, so a crash never leaves a half-written save"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Autosaver:
+    """
+    Writes saves on a background thread.
+
+    `submit` only swaps in the newest snapshot and returns; if the writer is still busy with an older one,
+    the older one is simply skipped.  A failed write (disk full, no permission) is kept in `error` and the writer
+    carries on, so the next snapshot gets another try.
+    """
+
+    def __init__(self, path: str = SAVE_PATH):
+        self.path = path
+        self.pending: bytes | None = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self.running = True
+        # The last write that failed, cleared by the next one that works
+        self.error: OSError | None = None
+        self.thread.start()
+
+    def submit(self, data: bytes) -> None:
+        with self.lock:
+            self.pending = data
+        self.wake.set()
+
+    def _run(self) -> None:
+        while self.running:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                data, self.pending = self.pending, None
+            if data is not None:
+                self._write(data)
+
+    def _write(self, data: bytes) -> None:
+        try:
+            write_atomic(self.path, data)
+        except OSError as e:
+            self.error = e
+        else:
+            self.error = None
+
+    def close(self: Self) -> None:
+        """Flushes anything still pending and stops the writer"""
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        with self.lock:
+            data, self.pending = self.pending, None
+        if data is not None:
+            self._write(data)
@@ -0,0 +1,72 @@
+"""
+The game loop: a fixed simulation timestep and a capped frame rate, driven by one timer.
+
+Ticks are scheduled against `monotonic()` instead of counting timer callbacks, so a late timer or a slow frame
+never loses production: whatever ticks are due get run together on the next frame.  Between ticks each frame
+renders with `alpha`, how far the clock is into the next tick, so totals can climb smoothly instead of jumping
+once a second.
+"""
+
+from collections.abc import Callable
+from time import monotonic
+from typing import Self
+
+# Seconds of real time per game tick
+TICK_SECONDS = 1.0
+FRAMES_PER_SECOND = 20
+# How often the measured rates are refreshed, in seconds
+RATE_WINDOW = 1.0
+
+
+class Scheduler:
+    def __init__(
+        self: Self,
+        simulate: Callable[[int], None],
+        render: Callable[[float], None],
+        tick_seconds: float = TICK_SECONDS,
+        frames_per_second: float = FRAMES_PER_SECOND,
+        clock: Callable[[], float] = monotonic,
+    ):
+        # Runs the given number of ticks
+        self.simulate = simulate
+        # Draws a frame, given how far (0 to 1) the clock is into the next tick
+        self.render = render
+        self.tick_seconds = tick_seconds
+        self.frame_budget = 1 / frames_per_second
+        self.clock = clock
+        now = clock()
+        self.last = now
+        self.last_render = now - self.frame_budget
+        self.accumulator = 0.0
+        # Ticks and frames per second, as measured over the last RATE_WINDOW
+        self.sim_rate = 0.0
+        self.render_rate = 0.0
+        self.window_start = now
+        self.window_ticks = 0
+        self.window_frames = 0
+
+    @property
+    def alpha(self: Self) -> float:
+        return self.accumulator / self.tick_seconds
+
+    def pump(self: Self) -> None:
+        """Runs every tick that's due, then renders unless a frame went out less than a frame budget ago"""
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator // self.tick_seconds)
+        if ticks:
+            # However far behind we fell, the backlog is handed over in one batch
+            self.accumulator -= ticks * self.tick_seconds
+            self.simulate(ticks)
+            self.window_ticks += ticks
+        # A little slack, so timer jitter doesn't skip every other frame
+        if now - self.last_render >= self.frame_budget * 0.9:
+            self.render(self.alpha)
+            self.last_render = now
+            self.window_frames += 1
+        if now - self.window_start >= RATE_WINDOW:
+            span = now - self.window_start
+            self.sim_rate = self.window_ticks / span
+            self.render_rate = self.window_frames / span
+            self.window_start, self.window_ticks, self.window_frames = now, 0, 0
@@ -0,0 +1,216 @@
+"""
+Headless simulation runner, for balancing the game without the TUI.
+
+Run from `src/`:
+
+    python -m game.sim --policy greedy --policy cheapest --seeds 200 --workers 8 > runs.jsonl
+
+Each run is printed as one JSON line with the tick every Upgrade was bought on (or null if it never
+happened), the final Resource and Producer totals, and sampled per-Resource curves.
+A summary per policy is printed to stderr.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from itertools import product
+
+from shared import ProducerType, UpgradeType, Status
+from game.game_state import GameState
+from game.advisor import Advisor, Key
+from game.registry import REGISTRY, Kind
+
+type Policy = Callable[[GameState], None]
+
+
+def new_game() -> GameState:
+    return GameState()
+
+
+def can_buy_upgrade(state: GameState, upgrade: UpgradeType) -> bool:
+    # Statuses only refresh on the next tick, so a just-bought Upgrade still reads as ENABLED until then
+    if state.upgrades[upgrade].status != Status.ENABLED or state.upgrades[upgrade].purchased:
+        return False
+    return all(state.resources[r].total >= c for r, c in state.upgrades[upgrade].cost.items())
+
+
+def greedy(state: GameState) -> None:
+    """Buys every Upgrade it can, then as many of each Producer as it can, newest Producers first"""
+    for utype in state.upgrades:
+        if can_buy_upgrade(state, utype):
+            state.purchase_upgrade(utype)
+    for ptype in reversed(state.producers):
+        if state.producers[ptype].status == Status.ENABLED:
+            state.purchase_producer(ptype, 0)
+
+
+def cheapest_first(state: GameState) -> None:
+    """Keeps buying whichever single affordable Producer or Upgrade has the lowest total cost"""
+    while True:
+        options = []
+        for utype, upgrade in state.upgrades.items():
+            if can_buy_upgrade(state, utype):
+                options.append((sum(upgrade.cost.values()), 1, utype))
+        for ptype, producer in state.producers.items():
+            if producer.status == Status.ENABLED and state.affordable(ptype):
+                options.append((sum(producer.cost.values()), 0, ptype))
+        if not options:
+            return
+        _, is_upgrade, key = min(options)
+        if is_upgrade:
+            state.purchase_upgrade(key)
+        else:
+            state.purchase_producer(key, 1)
+
+
+@dataclass
+class Scripted:
+    """
+    Works through a fixed list of purchases in order, waiting on each one until it's affordable.
+
+    Steps are `[name]` for an Upgrade, or `[name, amount]` for a Producer (amount 0 is "buy max").
+    Once the script runs out it falls back to `then`.
+    """
+
+    steps: list[list]
+    then: Policy = greedy
+    position: int = field(default=0, init=False)
+
+    def __call__(self, state: GameState) -> None:
+        while self.position < len(self.steps):
+            name, *amount = self.steps[self.position]
+            if REGISTRY.kind(name) == Kind.UPGRADE:
+                upgrade = UpgradeType(name)
+                if not can_buy_upgrade(state, upgrade):
+                    return
+                state.purchase_upgrade(upgrade)
+            else:
+                producer = ProducerType(name)
+                wanted = amount[0] if amount else 1
+                if state.producers[producer].status != Status.ENABLED or state.affordable(producer) < max(wanted, 1):
+                    return
+                state.purchase_producer(producer, wanted)
+            self.position += 1
+        self.then(state)
+
+
+@dataclass
+class Advised:
+    """Buys whatever the Advisor says pays for itself soonest, saving up for it when it isn't affordable yet"""
+
+    advisor: Advisor = field(default_factory=Advisor)
+
+    def __call__(self, state: GameState) -> None:
+        self.advisor.auto_buy(state, lambda key: buy(state, key))
+
+
+def buy(state: GameState, key: Key) -> None:
+    if key in state.producers:
+        state.purchase_producer(key, 1)
+    else:
+        state.purchase_upgrade(key)
+
+
+POLICIES: dict[str, Policy] = {
+    'greedy': greedy,
+    'cheapest': cheapest_first,
+}
+
+
+def load_policy(name: str) -> Policy:
+    """A policy name from POLICIES, `advisor`, or `script:<path>` for a JSON list of Scripted steps"""
+    if name.startswith('script:'):
+        with open(name.removeprefix('script:')) as f:
+            return Scripted(steps=json.load(f))
+    if name == 'advisor':
+        # Keeps scores between ticks, so every game needs its own
+        return Advised()
+    return POLICIES[name]
+
+
+@dataclass
+class RunConfig:
+    policy: str
+    seed: int
+    max_ticks: int = 4 * 60 * 60
+    # Average spacebar presses per second; the seed jitters the actual number each second
+    clicks: int = 5
+    # Record a point on each Resource's curve every this many ticks
+    sample_every: int = 60
+
+
+def run_game(config: RunConfig) -> dict:
+    state = new_game()
+    policy = load_policy(config.policy)
+    rng = random.Random(config.seed)
+    curves = {str(r): [] for r in state.resources}
+    finished = None
+    for tick in range(1, config.max_ticks + 1):
+        clicks = rng.randint(0, 2 * config.clicks)
+        # The same path a press of the Gather button takes, so CLICK effects and rounding match the game
+        state.gather(clicks)
+        policy(state)
+        state.tick()
+        if tick % config.sample_every == 0:
+            for rtype, resource in state.resources.items():
+                curves[str(rtype)].append(int(resource.total))
+        if all(u.purchased for u in state.upgrades.values()):
+            finished = tick
+            break
+    return {
+        'policy': config.policy,
+        'seed': config.seed,
+        'all_upgrades_tick': finished,
+        'resources': {str(r): int(v.total) for r, v in state.resources.items()},
+        'producers': {str(p): v.total for p, v in state.producers.items()},
+        'curves': curves,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m game.sim', description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--policy',
+        action='append',
+        help=f'One of {", ".join(POLICIES)}, advisor, or script:<path.json>.  Repeat to compare policies.',
+    )
+    parser.add_argument('--seeds', type=int, default=10, help='Runs per policy')
+    parser.add_argument('--max-ticks', type=int, default=RunConfig.max_ticks)
+    parser.add_argument('--clicks', type=int, default=RunConfig.clicks)
+    parser.add_argument('--sample-every', type=int, default=RunConfig.sample_every)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    # Only the command line needs these, and they're slow to import for everything else that imports this module
+    from concurrent.futures import ProcessPoolExecutor
+    from statistics import mean
+
+    args = parse_args(argv)
+    configs = [
+        RunConfig(policy, seed, args.max_ticks, args.clicks, args.sample_every)
+        for policy, seed in product(args.policy or ['greedy'], range(args.seeds))
+    ]
+    finished: dict[str, list[int | None]] = {c.policy: [] for c in configs}
+    workers = args.workers or os.cpu_count() or 1
+    # Big chunks keep the pickling overhead down, while still leaving a few chunks per worker to balance load
+    chunksize = max(1, len(configs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(run_game, configs, chunksize=chunksize):
+            finished[result['policy']].append(result['all_upgrades_tick'])
+            print(json.dumps(result))
+    for policy, ticks in finished.items():
+        done = [t for t in ticks if t is not None]
+        summary = f'{policy}: {len(done)}/{len(ticks)} bought every Upgrade'
+        if done:
+            summary += f' (ticks: min {min(done)}, mean {mean(done):,.0f}, max {max(done)})'
+        print(summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Per-tick time series of a game, kept in fixed-size ring buffers and logged to disk off the tick path.
+
+Attach a recorder to a GameState (`state.stats = StatsRecorder()`) and every tick records each Resource's total and
+production rate, and every purchase is recorded as an event.  The last CAPACITY ticks stay in memory, where
+`rate(resource, seconds)` ("Food/s over the last 60s") is two lookups: alongside the rates the buffer keeps a
+running sum of them, so any window's average is the difference of two sums.
+
+Every FLUSH_TICKS ticks the new rows are handed to a background writer, which appends them to the log as one
+zlib-compressed block of columns, so the complete run ends up on disk without a write on the tick path.
+
+The log is a series of records, each a one-byte kind and a little-endian length:
+    S  a session: the column names, newline-separated.  Every recorder starts its own, with ticks from 0.
+    B  a block: its first tick, row count and event count, then compressed float64 columns and
+       (tick, entity handle, amount) events.
+
+From `src/`, `python -m game.stats ../idle-ant.stats` prints a log as CSV.
+"""
+
+import argparse
+import queue
+import struct
+import sys
+import threading
+import zlib
+from collections import deque
+from collections.abc import Iterator
+from typing import Any, Self
+
+from shared import ResourceType, ProducerType, UpgradeType, Status
+from game.content import RESOURCE_CATALOG
+from game.registry import REGISTRY
+
+STATS_PATH = 'idle-ant.stats'
+# Ticks of history kept in memory; rolling averages can look back one less than this
+CAPACITY = 3600
+# Ticks per block written to the log
+FLUSH_TICKS = 60
+# Purchase events kept in memory
+EVENTS = 1000
+
+_RECORD = struct.Struct('<cI')
+_BLOCK = struct.Struct('<QII')
+_EVENT = struct.Struct('<qiq')
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        return float('inf')
+
+
+class _Writer:
+    """Appends blocks to the log on a background thread, in the order they were submitted"""
+
+    def __init__(self: Self, path: str, columns: list[str]):
+        self.path = path
+        self.blocks: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, args=(columns,), name='stats', daemon=True)
+        self.thread.start()
+
+    def submit(self: Self, block: tuple) -> None:
+        self.blocks.put(block)
+
+    def _run(self: Self, columns: list[str]) -> None:
+        with open(self.path, 'ab') as f:
+            names = '\n'.join(columns).encode()
+            f.write(_RECORD.pack(b'S', len(names)) + names)
+            f.flush()
+            while (block := self.blocks.get()) is not None:
+                first_tick, rows, events = block
+                body = [struct.pack(f'<{len(column)}d', *column) for column in rows]
+                body.extend(_EVENT.pack(*event) for event in events)
+                data = _BLOCK.pack(first_tick, len(rows[0]), len(events)) + zlib.compress(b''.join(body))
+                f.write(_RECORD.pack(b'B', len(data)) + data)
+                # Blocks are a minute apart, so flushing each one costs nothing and a crash loses at most one
+                f.flush()
+
+    def close(self: Self) -> None:
+        self.blocks.put(None)
+        self.thread.join()
+
+
+class StatsRecorder:
+    def __init__(self: Self, path: str | None = STATS_PATH, capacity: int = CAPACITY):
+        if capacity <= FLUSH_TICKS:
+            raise ValueError(f'capacity has to be more than FLUSH_TICKS ({FLUSH_TICKS})')
+        self.capacity = capacity
+        self.resources = list(RESOURCE_CATALOG)
+        self.index = {rtype: j for j, rtype in enumerate(self.resources)}
+        # One ring buffer per column, indexed by tick % capacity
+        self.totals = [[0.0] * capacity for _ in self.resources]
+        self.rates = [[0.0] * capacity for _ in self.resources]
+        # The sum of every rate recorded so far, as of each tick
+        self.produced = [[0.0] * capacity for _ in self.resources]
+        self.events: deque[tuple[int, ProducerType | UpgradeType, int]] = deque(maxlen=EVENTS)
+        self.tick = 0
+        # Ticks before this one are already on their way to the log
+        self.flushed = 0
+        self.pending_events: list[tuple[int, int, int]] = []
+        self.writer = _Writer(path, self.columns) if path else None
+
+    @property
+    def columns(self: Self) -> list[str]:
+        return [f'{r}.total' for r in self.resources] + [f'{r}.rate' for r in self.resources]
+
+    def sample(self: Self, state: Any, ticks: int = 1) -> None:
+        """
+        Records the `ticks` ticks that just ran.  Several at once (a fast-forward) are filled in as a straight
+        line from the last recorded totals, which is how they grew: production is constant through a fast-forward.
+        """
+        rates = [0.0] * len(self.resources)
+        boosts = state.boosts()
+        for producer in state.live.producers.values():
+            if producer.status == Status.ENABLED:
+                boost = boosts.get(producer.name, 1.0)
+                produced = producer.product.rate * boost * producer.total * state.DEBUG_MULTIPLIER
+                rates[self.index[producer.product.resource]] += produced
+        totals = [_float(resource.total) for resource in state.resources.values()]
+        last = (self.tick - 1) % self.capacity
+        before = [column[last] if self.tick else 0.0 for column in self.totals]
+        for step in range(1, ticks + 1):
+            slot = self.tick % self.capacity
+            for j, total in enumerate(totals):
+                if step < ticks:
+                    total = before[j] + (total - before[j]) * step / ticks
+                self.totals[j][slot] = total
+                self.rates[j][slot] = rates[j]
+                self.produced[j][slot] = (self.produced[j][slot - 1] if self.tick else 0.0) + rates[j]
+            self.tick += 1
+            if self.tick - self.flushed >= FLUSH_TICKS:
+                self.flush()
+
+    def event(self: Self, key: ProducerType | UpgradeType, amount: int = 1) -> None:
+        """A purchase, made during the tick that's about to be recorded"""
+        self.events.append((self.tick, key, amount))
+        if self.writer:
+            self.pending_events.append((self.tick, REGISTRY.handles[key], amount))
+
+    def rate(self: Self, resource: ResourceType, seconds: int = 60) -> float:
+        """Average production per tick of `resource` over the last `seconds` ticks (fewer, early on)"""
+        window = min(seconds, self.tick, self.capacity - 1)
+        if window <= 0:
+            return 0.0
+        produced = self.produced[self.index[resource]]
+        now = produced[(self.tick - 1) % self.capacity]
+        before = produced[(self.tick - 1 - window) % self.capacity] if self.tick > window else 0.0
+        return (now - before) / window
+
+    def curve(self: Self, resource: ResourceType, ticks: int | None = None) -> list[float]:
+        """The totals of `resource` over the last `ticks` ticks held in memory, oldest first"""
+        count = min(self.tick, self.capacity, ticks or self.capacity)
+        column = self.totals[self.index[resource]]
+        return [column[t % self.capacity] for t in range(self.tick - count, self.tick)]
+
+    def flush(self: Self) -> None:
+        """Hands every row not yet logged to the writer"""
+        if self.writer and self.tick > self.flushed:
+            ticks = range(self.flushed, self.tick)
+            rows = [[column[t % self.capacity] for t in ticks] for column in (*self.totals, *self.rates)]
+            self.writer.submit((self.flushed, rows, self.pending_events))
+            self.pending_events = []
+        self.flushed = self.tick
+
+    def close(self: Self) -> None:
+        """Logs everything still pending and waits for the writer to finish"""
+        self.flush()
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+
+def read_log(path: str = STATS_PATH) -> Iterator[tuple[list[str], list[list[float]], list[tuple[int, Any, int]]]]:
+    """
+    Every session in a log, as (column names, rows, events).  Each row starts with its tick; events are
+    (tick, key, amount).  A block cut off by a crash ends its session early.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset, session = 0, None
+    while offset + _RECORD.size <= len(data):
+        kind, size = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        record, offset = data[offset : offset + size], offset + size
+        if len(record) < size:
+            break
+        if kind == b'S':
+            if session:
+                yield session
+            session = (['tick', *record.decode().split('\n')], [], [])
+        elif kind == b'B' and session:
+            first_tick, rows, events = _BLOCK.unpack_from(record)
+            body = zlib.decompress(record[_BLOCK.size :])
+            width = len(session[0]) - 1
+            values = struct.unpack_from(f'<{width * rows}d', body)
+            for i in range(rows):
+                session[1].append([first_tick + i, *values[i::rows]])
+            for i in range(events):
+                tick, handle, amount = _EVENT.unpack_from(body, 8 * width * rows + i * _EVENT.size)
+                session[2].append((tick, REGISTRY.keys[handle], amount))
+    if session:
+        yield session
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m game.stats', description='Prints a stats log as CSV')
+    parser.add_argument('path', nargs='?', default=STATS_PATH)
+    parser.add_argument('--events', action='store_true', help='Print the purchase events instead of the samples')
+    args = parser.parse_args(argv)
+    for number, (columns, rows, events) in enumerate(read_log(args.path)):
+        if args.events:
+            print('session,tick,entity,amount')
+            for tick, key, amount in events:
+                print(f'{number},{tick},{key},{amount}')
+            continue
+        print(','.join(['session', *columns]))
+        for row in rows:
+            print(','.join([str(number), str(row[0]), *(repr(value) for value in row[1:])]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
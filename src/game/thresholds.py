@@ -0,0 +1,97 @@
+"""
+Which costs each Resource's total covers, kept up to date by the thresholds it crosses rather than by checking
+every cost on every frame.
+
+Every cost of every Producer and Upgrade is a threshold on one Resource, and each Resource keeps its thresholds
+sorted.  When a total moves from `last` to `total`, the thresholds that flipped are exactly the ones between the
+two, found with a pair of bisects; nothing else is looked at, so a frame where no cost is crossed costs one
+comparison per Resource.  Costs only change when something's bought (which bumps `GameState.revision`), and then
+only the entities whose costs actually changed are taken out of the index and put back in.  A purchase hands its
+entity a new cost dict rather than editing the old one, so spotting those is an identity check per entity.  Retired
+Producers are taken out for good.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Self
+
+from shared import ResourceType, ProducerType, UpgradeType
+
+type Key = ProducerType | UpgradeType
+
+
+class AffordabilityIndex:
+    def __init__(self: Self):
+        self.revision: int | None = None
+        # Per Resource, every cost on it in ascending order, and the (key, slot in its cost dict) it belongs to
+        self.costs: dict[ResourceType, list] = {}
+        self.owners: dict[ResourceType, list[tuple[Key, int]]] = {}
+        # The totals the flags below were worked out against
+        self.totals: dict[ResourceType, Any] = {}
+        # Whether each cost is covered, in the same order as the entity's cost dict
+        self.flags: dict[Key, list[bool]] = {}
+        # Each entity's costs as they were indexed, and the cost dict they were read from
+        self.indexed: dict[Key, tuple] = {}
+        self.sources: dict[Key, dict[ResourceType, Any]] = {}
+
+    def covered(self: Self, key: Key) -> tuple[bool, ...]:
+        return tuple(self.flags[key])
+
+    def _remove(self: Self, key: Key) -> None:
+        self.sources.pop(key, None)
+        for rtype, cost in self.indexed.pop(key, ()):
+            costs, owners = self.costs[rtype], self.owners[rtype]
+            # Equal costs sit side by side, so this entity's is somewhere in that run
+            i = bisect_left(costs, cost)
+            while owners[i][0] != key:
+                i += 1
+            del costs[i], owners[i]
+
+    def _insert(self: Self, key: Key, cost: dict[ResourceType, Any]) -> None:
+        self.indexed[key] = tuple(cost.items())
+        self.sources[key] = cost
+        self.flags[key] = []
+        for slot, (rtype, amount) in enumerate(cost.items()):
+            costs, owners = self.costs.setdefault(rtype, []), self.owners.setdefault(rtype, [])
+            i = bisect_right(costs, amount)
+            costs.insert(i, amount)
+            owners.insert(i, (key, slot))
+            self.flags[key].append(self.totals[rtype] >= amount)
+
+    def update(self: Self, state: Any) -> set[Key]:
+        """Brings the index up to date with `state`, returning the entities whose covered flags may have changed"""
+        changed: set[Key] = set()
+        if not self.totals:
+            self.totals = {rtype: resource.total for rtype, resource in state.resources.items()}
+        if state.revision != self.revision:
+            self.revision = state.revision
+            live = state.live
+            if len(self.indexed) > len(live.producers) + len(live.upgrades):
+                for key in [key for key in self.indexed if key not in live.producers and key not in live.upgrades]:
+                    self._remove(key)
+                    del self.flags[key]
+            sources = self.sources
+            for key, entity in (*live.producers.items(), *live.upgrades.items()):
+                cost = entity.cost
+                if cost is sources.get(key):
+                    continue
+                # A new dict can still hold the same costs (a load, or a colony view, which builds one per read)
+                if self.indexed.get(key) == tuple(cost.items()):
+                    sources[key] = cost
+                    continue
+                self._remove(key)
+                self._insert(key, cost)
+                changed.add(key)
+        for rtype, resource in state.resources.items():
+            total, last = resource.total, self.totals[rtype]
+            if total == last:
+                continue
+            self.totals[rtype] = total
+            costs = self.costs.get(rtype)
+            if not costs:
+                continue
+            before, after = bisect_right(costs, last), bisect_right(costs, total)
+            rising = after > before
+            for key, slot in self.owners[rtype][min(before, after) : max(before, after)]:
+                self.flags[key][slot] = rising
+                changed.add(key)
+        return changed
@@ -0,0 +1,213 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from heapq import heappush, heappop
+from time import perf_counter_ns
+from typing import Any
+
+from shared import ResourceType, ProducerType, UpgradeType, Status
+from shared.metrics import metrics
+
+type EntityType = ResourceType | ProducerType | UpgradeType
+# An (attribute, entity) pair a Rule reads, e.g. ('purchased', UpgradeType.CLUB)
+type Read = tuple[str, EntityType]
+
+
+@dataclass
+class StatusChange:
+    key: EntityType
+    status: Status
+
+
+def is_tracked(read: Read) -> bool:
+    """
+    Whether GameState reports every write to this input through `UnlockIndex.touch`.
+
+    Anything else (like Resource totals, which change every tick and on every click) is treated as volatile,
+    and rules that read it are re-checked on every pass.
+    """
+    attr, key = read
+    return attr in ('purchased', 'status') or (attr == 'total' and isinstance(key, ProducerType))
+
+
+def _bits(mask: int) -> list[int]:
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    When an entity is enabled, compiled from the content file (see `game.content`).
+
+    Entities are referred to by their ID, their position in the game's entity order (Resources, then Producers,
+    then Upgrades), so the Upgrade conditions are bitmasks over which Upgrades are bought, and `enabled` a
+    bitmask over which entities are enabled.
+    """
+
+    # Every one of these must be bought
+    bought: int = 0
+    # None of these may be bought
+    unless_bought: int = 0
+    # Every one of these must be enabled
+    enabled: int = 0
+    # (entity ID, minimum total) pairs
+    min_totals: tuple[tuple[int, int], ...] = ()
+
+    def reads(self, keys: list[EntityType]) -> set[Read]:
+        reads = {('purchased', keys[i]) for i in _bits(self.bought | self.unless_bought)}
+        reads |= {('status', keys[i]) for i in _bits(self.enabled)}
+        return reads | {('total', keys[i]) for i, _ in self.min_totals}
+
+
+@dataclass
+class UnlockIndex:
+    """
+    Checks every entity's Rule with a few integer operations, and only re-checks the ones whose inputs changed.
+
+    Which Upgrades are bought and which entities are enabled are kept as bitmasks, refreshed from the records for
+    every input GameState reports through `touch` (and rebuilt whole by `invalidate`).  Rules are still checked in
+    the same order `update_entities` always used (Resources, then Producers, then Upgrades), so a status flipped
+    early in a pass is seen by later rules in that pass.  Retired entities' rules are skipped for good.
+    """
+
+    entities: list[tuple[EntityType, Any]] = field(default_factory=list)
+    ids: dict[EntityType, int] = field(default_factory=dict)
+    rules: list[Rule] = field(default_factory=list)
+    dependents: dict[Read, set[int]] = field(default_factory=dict)
+    volatile: set[int] = field(default_factory=set)
+    # The retired entities, the IDs of their rules, and the volatile rules that are left to check every pass
+    retired: frozenset[EntityType] = frozenset()
+    skipped: frozenset[int] = frozenset()
+    checked: set[int] = field(default_factory=set)
+    bought: int = 0
+    enabled: int = 0
+    dirty: set[Read] = field(default_factory=set)
+    stale: set[int] = field(default_factory=set)
+
+    @staticmethod
+    def _entities(state: Any) -> list[tuple[EntityType, Any]]:
+        return [*state.resources.items(), *state.producers.items(), *state.upgrades.items()]
+
+    def build(self, state: Any) -> None:
+        self.entities = self._entities(state)
+        keys = [key for key, _ in self.entities]
+        self.ids = {key: i for i, key in enumerate(keys)}
+        self.rules = [entity.spec.rule for _, entity in self.entities]
+        self.dependents = {}
+        self.volatile = set()
+        for index, rule in enumerate(self.rules):
+            reads = rule.reads(keys)
+            for read in reads:
+                self.dependents.setdefault(read, set()).add(index)
+            if not all(is_tracked(read) for read in reads):
+                self.volatile.add(index)
+        self.skipped = frozenset(self.ids[key] for key in self.retired if key in self.ids)
+        self.checked = self.volatile - self.skipped
+        self.dirty = set()
+        self.invalidate()
+
+    def clone(self, state: Any) -> 'UnlockIndex':
+        """A copy of this index for `state`, which has to be a clone of the state this index was built for"""
+        if not self.entities:
+            return UnlockIndex(retired=self.retired)
+        # The rules and what depends on what never change after `build`, so those are shared
+        return UnlockIndex(
+            entities=self._entities(state),
+            ids=self.ids,
+            rules=self.rules,
+            dependents=self.dependents,
+            volatile=self.volatile,
+            retired=self.retired,
+            skipped=self.skipped,
+            checked=self.checked,
+            bought=self.bought,
+            enabled=self.enabled,
+            dirty=set(self.dirty),
+            stale=set(self.stale),
+        )
+
+    def retire(self, keys: Iterable[EntityType]) -> None:
+        """Stops checking the rules of `keys` too, which keep whatever status they have now"""
+        keys = [key for key in keys if key not in self.retired]
+        skipped = [self.ids[key] for key in keys if key in self.ids]
+        # New sets rather than changed in place, since clones share these
+        if keys:
+            self.retired = self.retired.union(keys)
+        if skipped:
+            self.skipped = self.skipped.union(skipped)
+            self.checked = self.checked.difference(skipped)
+
+    def invalidate(self) -> None:
+        """Forces every rule to be re-checked on the next pass, after changes made behind GameState's back"""
+        self.stale = set(range(len(self.entities)))
+        self.bought = self.enabled = 0
+        for index, (_, entity) in enumerate(self.entities):
+            self._refresh(index, entity)
+
+    def _refresh(self, index: int, entity: Any) -> None:
+        bit = 1 << index
+        if getattr(entity, 'purchased', False):
+            self.bought |= bit
+        else:
+            self.bought &= ~bit
+        if entity.status == Status.ENABLED:
+            self.enabled |= bit
+        else:
+            self.enabled &= ~bit
+
+    def touch(self, attr: str, key: EntityType) -> None:
+        self.dirty.add((attr, key))
+
+    @property
+    def settled(self) -> bool:
+        """True when a pass would re-check nothing but volatile rules"""
+        return not self.dirty and not self.stale
+
+    def passes(self, index: int) -> bool:
+        rule = self.rules[index]
+        if (self.bought & rule.bought) != rule.bought or self.bought & rule.unless_bought:
+            return False
+        if (self.enabled & rule.enabled) != rule.enabled:
+            return False
+        return all(self.entities[i][1].total >= minimum for i, minimum in rule.min_totals)
+
+    def update(self, state: Any) -> list[StatusChange]:
+        if not self.entities:
+            self.build(state)
+        queue = list(self.stale | self.checked)
+        for read in self.dirty:
+            index = self.ids[read[1]]
+            self._refresh(index, self.entities[index][1])
+            queue.extend(self.dependents.get(read, ()))
+        queue.sort()
+        self.stale = set()
+        self.dirty = set()
+        seen = set(self.skipped)
+        changes = []
+        # Looked up once, so this loop pays nothing for the instrumentation while it's off
+        timing = metrics.enabled
+        while queue:
+            index = heappop(queue)
+            if index in seen:
+                continue
+            seen.add(index)
+            key, entity = self.entities[index]
+            if timing:
+                start = perf_counter_ns()
+                status = Status.from_bool(self.passes(index))
+                metrics.record(f'rule[{key}]', perf_counter_ns() - start)
+            else:
+                status = Status.from_bool(self.passes(index))
+            if status == entity.status:
+                continue
+            entity.status = status
+            self._refresh(index, entity)
+            changes.append(StatusChange(key, status))
+            read = ('status', key)
+            for dependent in self.dependents.get(read, ()):
+                if dependent > index:
+                    heappush(queue, dependent)
+                else:
+                    # Already passed this one; like before, it sees the new status on the next pass
+                    self.dirty.add(read)
+        metrics.count('rules', len(seen))
+        return changes
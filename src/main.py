@@ -1,29 +1,76 @@
+from time import monotonic
+from typing import Any
+
 from textual.app import App, ComposeResult
 from textual.containers import Container
 from textual.events import Key
 from textual.widgets import Header, Footer
+from game.scheduler import Scheduler
+from shared.metrics import metrics
 from widgets import GameContainer
 from widgets.clock import GameClock
 
+# How often the debug panel refreshes (and a line is exported) while metrics are on, in seconds
+METRICS_SECONDS = 1.0
+
 
 class IdleApp(App):
     game_container: GameContainer | None = None
+    clock: GameClock | None = None
+    scheduler: Scheduler | None = None
+    # Only created the first time metrics are switched on
+    debug_panel: Any = None
+    metrics_shown: float = 0.0
     CSS_PATH = 'styles/idle.tcss'
-    BINDINGS = [('space', 'space', 'Gather Food'), ('q', 'quit', 'Quit')]
+    BINDINGS = [
+        ('space', 'space', 'Gather Food'),
+        ('a', 'autobuy', 'Auto-buy'),
+        ('d', 'metrics', 'Metrics'),
+        ('q', 'quit', 'Quit'),
+    ]
     TITLE = 'Antics'
 
     def compose(self) -> ComposeResult:
         yield Header()
         self.game_container = GameContainer(id='game_container')
         yield self.game_container
-        yield Container(GameClock(), id='clock_container')
+        self.clock = GameClock()
+        yield Container(self.clock, id='clock_container')
         yield Footer()
 
+    def on_mount(self) -> None:
+        # One timer drives everything: the Scheduler works out how many ticks are due and when to draw
+        self.scheduler = Scheduler(simulate=self.game_container.simulate, render=self.render_frame)
+        self.set_interval(interval=self.scheduler.frame_budget, callback=self.scheduler.pump)
+
+    def render_frame(self, alpha: float) -> None:
+        self.game_container.render_state(alpha)
+        self.clock.update_time()
+        if metrics.enabled and monotonic() - self.metrics_shown >= METRICS_SECONDS:
+            self.metrics_shown = monotonic()
+            metrics.gauge('sim_rate', self.scheduler.sim_rate)
+            metrics.gauge('render_rate', self.scheduler.render_rate)
+            self.debug_panel.show(metrics.export())
+
     def action_space(self):
         pass
 
+    def action_autobuy(self) -> None:
+        self.game_container.toggle_autobuy()
+
+    def action_metrics(self) -> None:
+        """Switches the instrumentation on or off; while it's on, snapshots are also appended to METRICS_PATH"""
+        if metrics.toggle():
+            metrics.reset()
+        if self.debug_panel is None:
+            from widgets import DebugPanel
+
+            self.debug_panel = DebugPanel(id='debug_panel')
+            self.mount(self.debug_panel, after=self.game_container)
+        self.debug_panel.set_class(not metrics.enabled, 'hidden')
+
     def on_key(self, event: Key) -> None:
-        print('main:', event.key)
+        metrics.count(f'key[{event.key}]')
         self.game_container.key_handler(event)
 
 
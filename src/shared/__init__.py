@@ -1,2 +1,3 @@
 from .constants import ResourceType, ProducerType, UpgradeType, Status
+from .bignum import BigNum
 from .conversion import abbrev_num, type_class, style_info
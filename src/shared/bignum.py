@@ -0,0 +1,277 @@
+"""
+A fixed-size number type for Resource totals and costs, which grow geometrically for as long as a game runs.
+
+Python ints would stay exact but get slower (and overflow the moment they meet a float), and floats run out at
+about 1e308, so BigNum keeps a float mantissa and a separate integer exponent instead.
+"""
+
+from math import floor, frexp, isfinite, ldexp, log10
+from typing import Any, Self
+
+_LOG10_2 = log10(2)
+# Ints at least this big are scaled down before turning them into a float, so they can't overflow
+_INT_LIMIT = 1 << 1000
+
+
+def _parts(value: Any) -> tuple[float, int]:
+    """The (mantissa, exponent) of an int, float or BigNum.  Raises TypeError for anything else."""
+    if type(value) is BigNum:
+        return value.mantissa, value.exponent
+    if isinstance(value, int) and not -_INT_LIMIT < value < _INT_LIMIT:
+        shift = abs(value).bit_length() - 64
+        # Int true division rounds correctly, so this is as exact as converting a smaller int to float
+        mantissa, exponent = frexp(value / (1 << shift))
+        return mantissa, exponent + shift
+    mantissa, exponent = frexp(value)
+    if not isfinite(mantissa):
+        raise ValueError(f'BigNum can not hold {value}')
+    return mantissa, exponent
+
+
+def _of(mantissa: float, exponent: int) -> 'BigNum':
+    """Builds a BigNum from an unnormalized mantissa, without going through `__init__`"""
+    mantissa, shift = frexp(mantissa)
+    num = object.__new__(BigNum)
+    num.mantissa = mantissa
+    num.exponent = exponent + shift if mantissa else 0
+    return num
+
+
+def _fmod(a: 'BigNum', b: 'BigNum') -> 'BigNum':
+    """`a` less a whole multiple of `b`, exactly, with the sign of `a` (like math.fmod)"""
+    if not b.mantissa:
+        raise ZeroDivisionError('BigNum modulo by zero')
+    # Below b's exponent, |a| < |b| already
+    if not a.mantissa or a.exponent < b.exponent:
+        return a
+    # Both mantissas as 53-bit ints; a is then that int times 2**(the exponent gap) in units of b's last bit
+    whole_a, whole_b = int(ldexp(a.mantissa, 53)), abs(int(ldexp(b.mantissa, 53)))
+    rest = abs(whole_a) * pow(2, a.exponent - b.exponent, whole_b) % whole_b
+    return _of(float(rest if whole_a > 0 else -rest), b.exponent - 53)
+
+
+class BigNum:
+    """
+    A number stored as `mantissa * 2**exponent`, with the mantissa a float in [0.5, 1) (or exactly 0).
+
+    Comparisons look at the mantissas alone when the exponents match, the signs differ or either side is zero, and
+    at the exponents otherwise.
+
+    Arithmetic is float arithmetic on the mantissas with the exponents tracked alongside, so within float range the
+    results are bit-for-bit what a float would give (whole numbers are exact up to 2**53), precision is always
+    53 bits, and every operation costs the same no matter how big the numbers get.  BigNums are immutable and mix
+    freely with ints and floats.
+    """
+
+    __slots__ = ('mantissa', 'exponent')
+
+    mantissa: float
+    exponent: int
+
+    def __init__(self, value: 'int | float | BigNum' = 0):
+        self.mantissa, self.exponent = _parts(value)
+
+    @staticmethod
+    def from_parts(mantissa: float, exponent: int) -> 'BigNum':
+        return _of(mantissa, exponent)
+
+    def __add__(self, other: Any) -> Self:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if not m2:
+            return self
+        if not m1:
+            return _of(m2, e2)
+        if e1 >= e2:
+            return _of(m1 + ldexp(m2, e2 - e1), e1)
+        return _of(ldexp(m1, e1 - e2) + m2, e2)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> Self:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if not m2:
+            return self
+        if not m1:
+            return _of(-m2, e2)
+        if e1 >= e2:
+            return _of(m1 - ldexp(m2, e2 - e1), e1)
+        return _of(ldexp(m1, e1 - e2) - m2, e2)
+
+    def __rsub__(self, other: Any) -> Self:
+        return -self + other
+
+    def __mul__(self, other: Any) -> Self:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        return _of(self.mantissa * m2, self.exponent + e2)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Any) -> Self:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        if not m2:
+            raise ZeroDivisionError('BigNum division by zero')
+        return _of(self.mantissa / m2, self.exponent - e2)
+
+    def __rtruediv__(self, other: Any) -> Self:
+        return BigNum(other) / self
+
+    def __floordiv__(self, other: Any) -> Self:
+        return divmod(self, other)[0]
+
+    def __rfloordiv__(self, other: Any) -> Self:
+        return divmod(BigNum(other), self)[0]
+
+    def __mod__(self, other: Any) -> Self:
+        return divmod(self, other)[1]
+
+    def __divmod__(self, other: Any) -> tuple[Self, Self]:
+        # The same steps as float divmod: the remainder first, exactly, then the quotient from it.  Flooring the
+        # quotient first goes wrong once it's past 2**53, where the leftover it implies can have either sign.
+        other = other if type(other) is BigNum else BigNum(other)
+        mod = _fmod(self, other)
+        div = (self - mod) / other
+        if mod.mantissa and (mod.mantissa < 0) != (other.mantissa < 0):
+            mod += other
+            div -= 1
+        whole = div.__floor__()
+        if div - whole > 0.5:
+            whole += 1
+        return whole, mod
+
+    def __neg__(self) -> Self:
+        return _of(-self.mantissa, self.exponent)
+
+    def __pos__(self) -> Self:
+        return self
+
+    def __abs__(self) -> Self:
+        return _of(abs(self.mantissa), self.exponent)
+
+    def __floor__(self) -> Self:
+        if self.exponent >= 53:
+            # Every bit of the mantissa is above the decimal point already
+            return self
+        return _of(floor(ldexp(self.mantissa, self.exponent)), 0)
+
+    def __round__(self, ndigits: int | None = None) -> Self:
+        if self.exponent >= 53:
+            return self
+        return _of(round(ldexp(self.mantissa, self.exponent), ndigits), 0)
+
+    def __bool__(self) -> bool:
+        return self.mantissa != 0
+
+    def __int__(self) -> int:
+        if self.exponent <= 1024:
+            return int(ldexp(self.mantissa, self.exponent))
+        return int(ldexp(self.mantissa, 53)) << (self.exponent - 53)
+
+    def __float__(self) -> float:
+        # Raises OverflowError past float range, just like float() of a huge int
+        return ldexp(self.mantissa, self.exponent)
+
+    def __eq__(self, other: Any) -> bool:
+        try:
+            m2, e2 = _parts(other)
+        except (TypeError, ValueError):
+            return NotImplemented
+        return self.mantissa == m2 and self.exponent == e2
+
+    def __lt__(self, other: Any) -> bool:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if e1 == e2 or m1 * m2 <= 0:
+            return m1 < m2
+        return (e1 < e2) if m1 > 0 else (e2 < e1)
+
+    def __le__(self, other: Any) -> bool:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if e1 == e2 or m1 * m2 <= 0:
+            return m1 <= m2
+        return (e1 <= e2) if m1 > 0 else (e2 <= e1)
+
+    def __gt__(self, other: Any) -> bool:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if e1 == e2 or m1 * m2 <= 0:
+            return m1 > m2
+        return (e1 > e2) if m1 > 0 else (e2 > e1)
+
+    def __ge__(self, other: Any) -> bool:
+        try:
+            m2, e2 = _parts(other)
+        except TypeError:
+            return NotImplemented
+        m1, e1 = self.mantissa, self.exponent
+        if e1 == e2 or m1 * m2 <= 0:
+            return m1 >= m2
+        return (e1 >= e2) if m1 > 0 else (e2 >= e1)
+
+    def __hash__(self) -> int:
+        # Has to match the hash of an equal int or float, so BigNums and plain numbers work as the same dict key
+        if self.exponent > 1024:
+            return hash(int(self))
+        return hash(ldexp(self.mantissa, self.exponent))
+
+    def decimal(self) -> tuple[float, int]:
+        """The value as a base-10 mantissa in [1, 10) and exponent, for display"""
+        if not self.mantissa:
+            return 0.0, 0
+        magnitude = log10(abs(self.mantissa)) + self.exponent * _LOG10_2
+        exponent = floor(magnitude)
+        mantissa = 10 ** (magnitude - exponent)
+        if mantissa >= 10:
+            mantissa, exponent = mantissa / 10, exponent + 1
+        return (mantissa if self.mantissa > 0 else -mantissa), exponent
+
+    def __str__(self) -> str:
+        if self.exponent <= 64 and (self.exponent >= 53 or ldexp(self.mantissa, self.exponent).is_integer()):
+            return str(int(self))
+        if self.exponent <= 1024:
+            return repr(float(self))
+        mantissa, exponent = self.decimal()
+        return f'{mantissa!r}e+{exponent}'
+
+    def __repr__(self) -> str:
+        return f'BigNum({self})'
+
+    def __format__(self, spec: str) -> str:
+        if not spec:
+            return str(self)
+        if self.exponent <= 1024:
+            return format(float(self), spec)
+        mantissa, exponent = self.decimal()
+        return f'{format(mantissa, spec)}e+{exponent}'
+
+    def __reduce__(self) -> tuple:
+        return _of, (self.mantissa, self.exponent)
+
+    def __copy__(self) -> Self:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self
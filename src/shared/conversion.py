@@ -1,31 +1,64 @@
 import re
+from functools import lru_cache
+from math import log10
 
 from shared import ResourceType, ProducerType, UpgradeType
+from shared.bignum import BigNum
 
+# Indexed by how many groups of 3 digits the number has
+_SUFFIXES = ['', 'K', 'M', 'B', 'T', 'Quad', 'Quint', 'Sext', 'Sept', 'Oct', 'Non']
+_THRESHOLDS = [1.0, 1e3, 1e6, 1e9, 1e12, 1e15, 1e18, 1e21, 1e24, 1e27, 1e30]
+# Past the last suffix the numbers get too long to read, so they switch to scientific notation
+_SCIENTIFIC = 1e33
+_PRODUCER_NAMES = frozenset(ProducerType)
 
-def format_num(number: int | float) -> str:
+
+def format_num(number: int | float | BigNum) -> str:
     """Formats a number to have commas every 3 digits"""
     return f'{float(number):,.2f}'.rstrip('0').rstrip('.')
 
 
-def abbrev_num(number: int | float) -> str:
+@lru_cache(maxsize=4096)
+def abbrev_num(number: int | float | BigNum) -> str:
     """Helpful for displaying large numbers as the game progresses"""
-    suffixes = [
-        (1e30, 'Non'),
-        (1e27, 'Oct'),
-        (1e24, 'Sept'),
-        (1e21, 'Sext'),
-        (1e18, 'Quint'),
-        (1e15, 'Quad'),
-        (1e12, 'T'),
-        (1e9, 'B'),
-        (1e6, 'M'),
-        (1e3, 'K'),
-    ]
-    for threshold, suffix in suffixes:
-        if number >= threshold:
-            return f'{format_num(number / threshold)}{suffix}'
-    return format_num(number)
+    if number < 1e3:
+        return format_num(number)
+    if number >= _SCIENTIFIC:
+        mantissa, exponent = BigNum(number).decimal()
+        mantissa = round(mantissa, 2)
+        if mantissa >= 10:
+            mantissa, exponent = mantissa / 10, exponent + 1
+        return f'{format_num(mantissa)}e{exponent}'
+    number = float(number)
+    tier = min(int(log10(number)) // 3, len(_SUFFIXES) - 1)
+    # log10 rounds up for numbers just under a power of 10 (like 10**15 - 1), so step back if it overshot
+    if number < _THRESHOLDS[tier]:
+        tier -= 1
+    return f'{format_num(number / _THRESHOLDS[tier])}{_SUFFIXES[tier]}'
+
+
+@lru_cache(maxsize=1024)
+def cost_markup(costs: tuple[tuple[ResourceType, BigNum, bool], ...]) -> str:
+    """Markup for a cost subtitle, from (resource, cost, affordable) triples"""
+    out = []
+    for resource, cost, affordable in costs:
+        if not affordable:
+            out.append(f'[red]{abbrev_num(cost)} {resource}[/red]')
+        else:
+            out.append(f'[green]{abbrev_num(cost)} {resource}[/green]')
+    return f'{" | ".join(out)}'
+
+
+@lru_cache(maxsize=1024)
+def format_duration(seconds: int) -> str:
+    """A short wait like '45s', '12m' or '3h 20m', only as precise as it's worth reading"""
+    if seconds < 60:
+        return f'{seconds}s'
+    if seconds < 3600:
+        return f'{seconds // 60}m'
+    if seconds < 86400:
+        return f'{seconds // 3600}h {seconds % 3600 // 60}m'
+    return f'{seconds // 86400}d {seconds % 86400 // 3600}h'
 
 
 def type_class(type: ResourceType | ProducerType | UpgradeType) -> str:
@@ -33,15 +66,12 @@ def type_class(type: ResourceType | ProducerType | UpgradeType) -> str:
     return type.replace(' ', '-')
 
 
+@lru_cache(maxsize=512)
 def style_info(info: str) -> str:
     def is_producer(word: str) -> bool:
         if not word.endswith('s'):
             word += 's'
-        try:
-            ProducerType(word)
-            return True
-        except ValueError:
-            return False
+        return word in _PRODUCER_NAMES
 
     words = info.split(' ')
     for i, word in enumerate(words):
@@ -0,0 +1,139 @@
+"""
+Timers and counters for the engine and UI hot paths, switched on and off while the game runs.
+
+    @timed('tick')
+    def tick(self): ...
+
+    with metrics.timer('render_state'):
+        ...
+
+    metrics.count('rows_applied', len(keys))
+
+Everything checks `metrics.enabled` first, so while it's off a timed function costs one extra call and a flag
+check, and loops too hot even for that (like the unlock rule pass) hoist the flag out of the loop themselves.
+While it's on, every timer keeps its last WINDOW samples, for rolling percentiles.
+"""
+
+import json
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter_ns, time
+from typing import Any, Self
+
+# How many of the most recent samples each timer keeps
+WINDOW = 1000
+METRICS_PATH = 'idle-ant.metrics.jsonl'
+
+_OFF = nullcontext()
+
+
+class Samples:
+    """A ring buffer of the last WINDOW durations for one timer, in nanoseconds"""
+
+    __slots__ = ('values', 'position', 'count')
+
+    def __init__(self: Self):
+        self.values = [0] * WINDOW
+        self.position = 0
+        # Every sample ever added, not just the ones still held
+        self.count = 0
+
+    def add(self: Self, value: int) -> None:
+        self.values[self.position] = value
+        self.position = (self.position + 1) % WINDOW
+        self.count += 1
+
+    def summary(self: Self) -> dict[str, float]:
+        held = sorted(self.values[: min(self.count, WINDOW)])
+        if not held:
+            return {'count': 0}
+
+        def percentile(p: float) -> float:
+            return round(held[min(int(p * len(held)), len(held) - 1)] / 1000, 2)
+
+        return {
+            'count': self.count,
+            'p50_us': percentile(0.5),
+            'p90_us': percentile(0.9),
+            'p99_us': percentile(0.99),
+            'max_us': round(held[-1] / 1000, 2),
+        }
+
+
+class Metrics:
+    def __init__(self: Self):
+        self.enabled = False
+        self.timers: dict[str, Samples] = {}
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, float] = {}
+
+    def toggle(self: Self) -> bool:
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def reset(self: Self) -> None:
+        self.timers, self.counters, self.gauges = {}, {}, {}
+
+    def record(self: Self, name: str, nanoseconds: int) -> None:
+        samples = self.timers.get(name)
+        if samples is None:
+            samples = self.timers[name] = Samples()
+        samples.add(nanoseconds)
+
+    def count(self: Self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self: Self, name: str, value: float) -> None:
+        if self.enabled:
+            self.gauges[name] = value
+
+    @contextmanager
+    def _timer(self: Self, name: str):
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter_ns() - start)
+
+    def timer(self: Self, name: str):
+        """A context manager timing its block under `name`"""
+        return self._timer(name) if self.enabled else _OFF
+
+    def snapshot(self: Self) -> dict[str, Any]:
+        return {
+            'time': round(time(), 3),
+            'timers': {name: samples.summary() for name, samples in sorted(self.timers.items())},
+            'counters': dict(sorted(self.counters.items())),
+            'gauges': dict(sorted(self.gauges.items())),
+        }
+
+    def export(self: Self, path: str = METRICS_PATH) -> dict[str, Any]:
+        """Appends a snapshot to `path` as a JSON line, and returns it"""
+        snapshot = self.snapshot()
+        with open(path, 'a') as f:
+            f.write(json.dumps(snapshot) + '\n')
+        return snapshot
+
+
+metrics = Metrics()
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Times every call of the decorated function under `name` while metrics are on"""
+
+    def decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.record(name, perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorate
@@ -1,5 +1,31 @@
-from .buttons import BuyButton
-from .columns import ProducersColumn, ResourcesColumn, UpgradesColumn
-from .clock import GameClock
-from .game_container import GameContainer
-from .rows import ProducerRow, ResourceRow, UpgradeRow
+"""
+The TUI's widgets.  Each one is imported the first time it's asked for (`from widgets import GameContainer`), so
+importing the package costs nothing until a widget is actually needed, and the panels only shown on demand don't
+slow down the first frame.
+"""
+
+from importlib import import_module
+
+_MODULES = {
+    'BuyButton': 'buttons',
+    'ProducersColumn': 'columns',
+    'ResourcesColumn': 'columns',
+    'UpgradesColumn': 'columns',
+    'GameClock': 'clock',
+    'DebugPanel': 'debug',
+    'GameContainer': 'game_container',
+    'ProducerRow': 'rows',
+    'ResourceRow': 'rows',
+    'UpgradeRow': 'rows',
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{_MODULES[name]}', __name__), name)
+    # Cached, so this only runs on the first lookup
+    globals()[name] = value
+    return value
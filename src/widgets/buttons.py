@@ -1,12 +1,8 @@
 from textual.widgets import Button
-from textual.reactive import reactive
-from game import GameState
 from shared import type_class
 
 
 class BuyButton(Button):
-    game_state: reactive[GameState] = reactive(GameState())
-
     def __init__(self, key_type: any, amount: int, **kwargs):
         classes = 'buy'
         if amount == 0:
@@ -1,20 +1,18 @@
 from time import monotonic
 
-from textual.timer import Timer
 from textual.reactive import reactive
 from textual.widgets import Static
 
 
 class GameClock(Static):
+    """Shows how long the game has been running.  `update_time` is called on every frame by the app's Scheduler."""
+
     start_time: reactive[float] = reactive(monotonic())
     time: reactive[float] = reactive(0.0)
-    update_timer: Timer | None = None
-
-    def on_mount(self) -> None:
-        self.update_timer = self.set_interval(interval=1, callback=self.update_time)
 
     def update_time(self) -> None:
-        self.time = monotonic() - self.start_time
+        # Whole seconds only, so the text is only rebuilt once a second however often frames are drawn
+        self.time = float(int(monotonic() - self.start_time))
 
     def watch_time(self, time: float) -> None:
         min, sec = divmod(time, 60)
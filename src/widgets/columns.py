@@ -1,60 +1,42 @@
 from textual.app import ComposeResult
-from textual.reactive import reactive
 from textual.containers import ScrollableContainer
 
-from game.producer import Producer
-from game.resource import Resource
-from game.upgrade import Upgrade
-from shared import ResourceType, ProducerType, UpgradeType, abbrev_num
+from shared import ResourceType, ProducerType, UpgradeType
 from game import GameState
-from widgets.rows import ResourceRow, ProducerRow, UpgradeRow
-
-
-type T = ProducerType | UpgradeType
-type U = Producer | Upgrade
-
-
-def build_cost_subtitle(record: dict[T, U], resources: dict[ResourceType, Resource], key: T) -> str:
-    out = []
-    if key in UpgradeType and record[key].boost:
-        return f'ALL [bold cyan]{record[key].boost.cost}[/]'
-    for resource, cost in record[key].cost.items():
-        if resources[resource].total < cost:
-            out.append(f'[red]{abbrev_num(cost)} {resource}[/red]')
-        else:
-            out.append(f'[green]{abbrev_num(cost)} {resource}[/green]')
-    return f'{" | ".join(out)}'
+from widgets.rows import ResourceRow, ProducerRow, UpgradeRow, build_cost_subtitle
 
 
 class ResourcesColumn(ScrollableContainer):
     BORDER_TITLE = '[b]Resources[/b]'
     DEFAULT_CLASSES = 'display-column'
 
-    game_state: reactive[GameState] = reactive(GameState())
+    def __init__(self, game_state: GameState, **kwargs):
+        super().__init__(**kwargs)
+        self.game_state = game_state
 
     def compose(self) -> ComposeResult:
-        for resource in ResourceType:
-            yield ResourceRow(ResourceType(resource), self.game_state.get_status(resource)).data_bind(
-                ResourcesColumn.game_state
-            )
+        for resource in self.game_state.live.resources:
+            yield ResourceRow(ResourceType(resource), self.game_state.get_status(resource))
 
 
 class ProducersColumn(ScrollableContainer):
     BORDER_TITLE = '[b]Producers[/b]'
     DEFAULT_CLASSES = 'display-column'
 
-    game_state: reactive[GameState] = reactive(GameState())
+    def __init__(self, game_state: GameState, **kwargs):
+        super().__init__(**kwargs)
+        self.game_state = game_state
 
     def compose(self) -> ComposeResult:
-        for producer in ProducerType:
+        for producer in self.game_state.live.producers:
             row = ProducerRow(
                 key_type=ProducerType(producer),
                 status=self.game_state.get_status(producer),
                 gather_rate=self.game_state.gather_rate(producer),
-                boosted=self.game_state.producers[producer].boost is not None,
-            ).data_bind(ProducersColumn.game_state)
+                boosted=self.game_state.boosted(producer),
+            )
             row.border_title = f'[b cyan]{producer}[/] ({self.game_state.producers[producer].total})'
-            row.border_subtitle = build_cost_subtitle(self.game_state.producers, self.game_state.resources, producer)
+            row.border_subtitle = build_cost_subtitle(self.game_state, producer)
             yield row
 
 
@@ -62,7 +44,9 @@ class UpgradesColumn(ScrollableContainer):
     BORDER_TITLE = '[b]Upgrades[/b]'
     DEFAULT_CLASSES = 'display-column'
 
-    game_state: reactive[GameState] = reactive(GameState())
+    def __init__(self, game_state: GameState, **kwargs):
+        super().__init__(**kwargs)
+        self.game_state = game_state
 
     def compose(self) -> ComposeResult:
         for upgrade in UpgradeType:
@@ -70,8 +54,8 @@ class UpgradesColumn(ScrollableContainer):
                 key_type=UpgradeType(upgrade),
                 status=self.game_state.get_status(upgrade),
                 upgrade_text=self.game_state.upgrades[upgrade].info,
-            ).data_bind(UpgradesColumn.game_state)
+            )
             # TODO: Add back parenthetical total here...?
             row.border_title = f'[b]{upgrade}[/b]'
-            row.border_subtitle = build_cost_subtitle(self.game_state.upgrades, self.game_state.resources, upgrade)
+            row.border_subtitle = build_cost_subtitle(self.game_state, upgrade)
             yield row
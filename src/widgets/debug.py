@@ -0,0 +1,25 @@
+from typing import Any
+
+from textual.widgets import Static
+
+from widgets.rows import parsed
+
+
+class DebugPanel(Static):
+    """Rolling percentiles for every timer, plus the counters and gauges, from a `Metrics.snapshot`"""
+
+    BORDER_TITLE = '[b]Metrics[/b]'
+
+    def show(self, snapshot: dict[str, Any]) -> None:
+        lines = [f'[b]{"timer":<32} {"count":>8} {"p50":>9} {"p90":>9} {"p99":>9}[/b]']
+        for name, summary in snapshot['timers'].items():
+            if not summary['count']:
+                continue
+            p50, p90, p99 = summary['p50_us'], summary['p90_us'], summary['p99_us']
+            lines.append(f'{name[:32]:<32} {summary["count"]:>8} {p50:>8.1f}µ {p90:>8.1f}µ {p99:>8.1f}µ')
+        lines.append('')
+        for name, value in snapshot['counters'].items():
+            lines.append(f'{name[:32]:<32} {value:>8,}')
+        for name, value in snapshot['gauges'].items():
+            lines.append(f'{name[:32]:<32} {value:>8.1f}')
+        self.update(parsed('\n'.join(lines)))
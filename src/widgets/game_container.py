@@ -1,37 +1,162 @@
+import os
+
 from textual.app import ComposeResult
 from textual.containers import HorizontalScroll
 from textual.events import Key
-from textual.reactive import reactive
 from textual.widgets import Button, Static
 from shared import ResourceType, ProducerType, UpgradeType
+from shared.metrics import metrics, timed
 from game import GameState
+from game.advisor import Advisor
+from game.commands import Command, Gather, BuyProducer, BuyUpgrade, coalesce
+from game.diff import DiffTracker
+from game.effects import Effect
+from game.journal import JOURNAL_PATH, Journal
+from game.registry import REGISTRY, Kind
+from game.save import SAVE_PATH, Autosaver, SaveError, dumps, loads
+from game.stats import STATS_PATH, StatsRecorder
 from widgets import ResourcesColumn, ProducersColumn, UpgradesColumn
+from widgets.rows import Row
 
 
 class GameContainer(Static):
-    # Disabling recompose here causes it to stop updating after the first button press...
-    game_state: reactive[GameState] = reactive(GameState(), recompose=True)
+    """
+    Holds the GameState and the three columns showing it.
+
+    The widget tree is composed once and stays mounted; on every frame `render_state` diffs the state against
+    what's on screen and only updates the rows that are affected.  The app's Scheduler decides when `simulate`
+    and `render_state` run.  Input handlers only queue commands, and everything queued since the last frame is
+    applied as one batch (a held-down space bar becomes a single Gather) right before the next tick or frame.
+    """
+
+    AUTOSAVE_SECONDS = 15
+
+    def __init__(
+        self, save_path: str = SAVE_PATH, journal_path: str = JOURNAL_PATH, stats_path: str = STATS_PATH, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.game_state = GameState()
+        self.load_error: str | None = None
+        if os.path.exists(save_path):
+            try:
+                with open(save_path, 'rb') as f:
+                    loads(f.read(), self.game_state)
+            except SaveError as e:
+                self.load_error = str(e)
+        self.autosaver = Autosaver(save_path)
+        # The autosave failure last shown, so a full disk isn't reported every 15 seconds
+        self.save_error: str | None = None
+        # Everything the player does from here on is journaled, so the session can be replayed headlessly
+        self.journal = Journal(journal_path, self.game_state)
+        # Per-tick curves of the whole session, logged in the background
+        self.game_state.stats = StatsRecorder(stats_path)
+        self.game_state.effects.listeners.append(self.effect_ended)
+        self.tracker = DiffTracker()
+        self.rows: dict[ResourceType | ProducerType | UpgradeType, Row] = {}
+        # Picks the "best next buy" to highlight, and drives the auto-buyer when that's switched on
+        self.advisor = Advisor()
+        self.autobuy = False
+        self.best_buy: ProducerType | UpgradeType | None = None
+        # Input waiting for the next frame
+        self.pending: list[Command] = []
+        # Button ID to the command it queues; filled in once the buttons are mounted
+        self.routes: dict[str, Command | None] = {}
 
     def on_mount(self) -> None:
-        self.set_interval(interval=1, callback=self.tick)
+        self.rows = {row.key_type: row for row in self.query(Row)}
+        # Every button's command, worked out once, so a press is a single lookup
+        self.routes = {button.id: REGISTRY.route(button.id) for button in self.query(Button) if button.id}
+        self.render_state()
+        self.set_interval(interval=self.AUTOSAVE_SECONDS, callback=self.autosave)
+        if self.load_error:
+            self.notify(f'{self.load_error}; starting a new game', severity='warning')
+
+    def on_unmount(self) -> None:
+        self.apply_input()
+        self.autosaver.submit(dumps(self.game_state))
+        self.autosaver.close()
+        self.journal.close()
+        self.game_state.stats.close()
+
+    def autosave(self) -> None:
+        # Snapshotting is a few microseconds; the disk write happens on the autosaver's thread
+        error = self.autosaver.error
+        if error and str(error) != self.save_error:
+            self.notify(f'Autosave failed: {error}', severity='error')
+        self.save_error = str(error) if error else None
+        self.autosaver.submit(dumps(self.game_state))
 
     def compose(self) -> ComposeResult:
         yield HorizontalScroll(
-            ResourcesColumn().data_bind(GameContainer.game_state),
-            ProducersColumn().data_bind(GameContainer.game_state),
-            UpgradesColumn().data_bind(GameContainer.game_state),
+            ResourcesColumn(self.game_state),
+            ProducersColumn(self.game_state),
+            UpgradesColumn(self.game_state),
         )
 
-    def tick(self) -> None:
-        self.game_state.tick()
-        self.mutate_reactive(GameContainer.game_state)
+    @timed('render_state')
+    def render_state(self, alpha: float = 0.0) -> None:
+        """Draws the state `alpha` of the way into the next tick; Resource totals count up in between"""
+        self.apply_input()
+        diff = self.tracker.diff(self.game_state, self.game_state.projected_totals(alpha))
+        for key in diff.retired:
+            # Folded away for good, so the row goes rather than just being hidden
+            if row := self.rows.pop(key, None):
+                row.remove()
+            if key == self.best_buy:
+                self.best_buy = None
+        keys = diff.keys
+        for key in keys:
+            self.rows[key].apply(self.game_state, diff)
+        metrics.count('rows_applied', len(keys))
+        with metrics.timer('advisor'):
+            best = self.advisor.best(self.game_state)
+        if best != self.best_buy:
+            if self.best_buy is not None:
+                self.rows[self.best_buy].remove_class('best-buy')
+            if best is not None:
+                self.rows[best].add_class('best-buy')
+            self.best_buy = best
+
+    @timed('simulate')
+    def simulate(self, ticks: int) -> None:
+        """Runs `ticks` ticks.  A backlog (after the app stalled) is fast-forwarded rather than run tick by tick."""
+        self.apply_input()
+        while ticks > 0:
+            # Stopping at each keyframe, so the journal snapshots the state at the right tick
+            count = min(ticks, self.journal.ticks_to_keyframe)
+            self.game_state.advance(count)
+            self.journal.tick(self.game_state, count)
+            ticks -= count
+            if self.autobuy:
+                self.advisor.auto_buy(self.game_state, self.purchase)
+
+    def effect_ended(self, effect: Effect) -> None:
+        self.notify(f'{effect.source or "Boost"} on {effect.target} ran out')
+
+    def queue(self, command: Command) -> None:
+        coalesce(self.pending, command)
+
+    def apply_input(self) -> None:
+        if self.pending:
+            commands, self.pending = self.pending, []
+            self.apply(commands)
+
+    def apply(self, commands: list[Command]) -> None:
+        self.game_state.apply(commands)
+        self.journal.apply(commands)
+        metrics.count('commands', len(commands))
+
+    def purchase(self, key: ProducerType | UpgradeType) -> None:
+        """Buys one right away, for the auto-buyer, which has to see each purchase before picking the next"""
+        self.apply([BuyProducer(key) if REGISTRY.kind(key) == Kind.PRODUCER else BuyUpgrade(key)])
+
+    def toggle_autobuy(self) -> None:
+        self.autobuy = not self.autobuy
+        self.notify(f'Auto-buy {"on" if self.autobuy else "off"}')
 
     def key_handler(self, event: Key) -> None:
         if event.key == 'space':
-            self.game_state.resources[ResourceType.FOOD].total += int(
-                1 * self.game_state.DEBUG_MULTIPLIER * self.game_state.click_modifier
-            )
-            self.mutate_reactive(GameContainer.game_state)
+            self.queue(Gather())
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """
@@ -44,19 +169,6 @@ class GameContainer(Static):
         IF you have a lot of spare time later, feel free to do a deeper dive.  Until then,
         they will remain here...
         """
-        match event.button.id.split('-'):
-            case ['gather']:
-                self.game_state.resources[ResourceType.FOOD].total += int(
-                    1 * self.game_state.DEBUG_MULTIPLIER * self.game_state.click_modifier
-                )
-                self.mutate_reactive(GameContainer.game_state)
-            case [*obj_type, num] if ' '.join(obj_type) in ProducerType:
-                obj_type = ' '.join(obj_type)
-                self.game_state.purchase_producer(ProducerType(obj_type), int(num))
-                self.mutate_reactive(GameContainer.game_state)
-            case [*obj_type, 'upgrade'] if ' '.join(obj_type) in UpgradeType:
-                obj_type = ' '.join(obj_type)
-                self.game_state.purchase_upgrade(UpgradeType(obj_type))
-                self.mutate_reactive(GameContainer.game_state)
-            case _:
-                pass
+        command = self.routes.get(event.button.id)
+        if command is not None:
+            self.queue(command)
@@ -1,14 +1,51 @@
-from textual.app import ComposeResult, NoMatches
-from textual.reactive import reactive
+from functools import lru_cache
+
+from rich.text import Text
+from textual.app import ComposeResult
 from textual.widgets import Button, Static
 from textual.containers import Horizontal
 from shared import ResourceType, ProducerType, UpgradeType, Status, abbrev_num, type_class
+from shared.conversion import cost_markup, format_duration
+from shared.metrics import timed
 from game import GameState
+from game.diff import StateDiff
+from game.registry import REGISTRY, Kind
 from widgets import BuyButton
 
 
+type T = ProducerType | UpgradeType
+
+
+@timed('build_cost_subtitle')
+def build_cost_subtitle(game_state: GameState, key: T, amount: int = 1) -> str:
+    if REGISTRY.kind(key) == Kind.UPGRADE:
+        if game_state.upgrades[key].boost:
+            return f'ALL [bold cyan]{game_state.upgrades[key].boost.cost}[/]'
+        costs = game_state.upgrades[key].cost
+    else:
+        costs = game_state.producer_cost(key, amount)
+    resources = game_state.resources
+    markup = cost_markup(tuple((resource, cost, resources[resource].total >= cost) for resource, cost in costs.items()))
+    # Only the next one has a wait shown; buying several isn't something the row offers a cost for
+    eta = game_state.eta(key) if amount == 1 else None
+    return f'{markup} [dim]~{format_duration(eta)}[/]' if eta else markup
+
+
+@lru_cache(maxsize=1024)
+def parsed(markup: str) -> Text:
+    """
+    Parsed Rich Text for `markup`, so repeated updates with the same text skip the markup parser.
+    Static keeps a Text it's given as-is, so sharing them between widgets is fine as long as nothing mutates them.
+    """
+    return Text.from_markup(markup)
+
+
 class Row(Horizontal):
-    game_state: reactive[GameState] = reactive(GameState())
+    """
+    A single entry in one of the columns.
+
+    Rows stay mounted for the whole game; `apply` updates just the parts of the row that a StateDiff says changed.
+    """
 
     def __init__(self, key_type: ResourceType | ProducerType | UpgradeType, status: Status):
         super().__init__()
@@ -20,6 +57,11 @@ class Row(Horizontal):
         if self.status == Status.DISABLED:
             classes.append('hidden')
         self.classes = classes
+        # Every buy button starts out disabled, and is only touched when that flips.  They're only enabled while the
+        # row is and every cost is covered.
+        self.buttons: list[Button] = []
+        self.buy_disabled = True
+        self.covered = False
 
     def compose_text(self, is_food: bool = False, inner_text: str | None = None) -> ComposeResult:
         if inner_text:
@@ -28,28 +70,26 @@ class Row(Horizontal):
             yield Static(str(self.key_type), classes='entry-text' + (' food' if is_food else ''))
             yield Static('0', classes='entry-value' + (' food' if is_food else ''))
 
-    def btn_disabled(self, btn: BuyButton, record: dict) -> bool:
-        mult = btn.amount if isinstance(btn, BuyButton) else 1
-        for resource, cost in record[self.key_type].cost.items():
-            if hasattr(btn, 'amount') and btn.amount == 0 and self.game_state.resources[resource].total < cost:
-                return True
-            elif self.game_state.resources[resource].total < cost * mult:
-                return True
-        return False
-
-    def update_btn_states(self, record: dict) -> None:
-        btns = self.query('.buy')
-        for btn in btns:
-            btn.disabled = self.btn_disabled(btn, record)
-
-    def _game_state(self, game_state: GameState, new_total: int) -> None:
-        self.status = game_state.get_status(self.key_type)
-        if self.status != Status.DISABLED:
-            self.classes = [x for x in self.classes if x != 'hidden']
-        try:
-            self.query_one('.entry-value', Static).update(abbrev_num(new_total))
-        except NoMatches:
-            pass
+    def apply(self, game_state: GameState, diff: StateDiff) -> None:
+        if self.key_type in diff.statuses:
+            self.status = diff.statuses[self.key_type]
+            if self.status == Status.DISABLED:
+                self.add_class('hidden')
+            else:
+                self.remove_class('hidden')
+
+    def apply_cost(self, game_state: GameState, diff: StateDiff) -> None:
+        key = self.key_type
+        if key in diff.affordable or key in diff.costs or key in diff.etas:
+            self.border_subtitle = build_cost_subtitle(game_state, key)
+        if key in diff.affordable:
+            self.covered = all(diff.affordable[key])
+        if key in diff.affordable or key in diff.statuses:
+            disabled = self.status != Status.ENABLED or not self.covered
+            if disabled != self.buy_disabled:
+                self.buy_disabled = disabled
+                for btn in self.buttons:
+                    btn.disabled = disabled
 
 
 class ResourceRow(Row):
@@ -64,8 +104,10 @@ class ResourceRow(Row):
         if self.is_food:
             yield Button('Gather', id='gather', classes='gather-btn', variant='success')
 
-    def watch_game_state(self, game_state: GameState) -> None:
-        super()._game_state(game_state, game_state.resources[self.key_type].total)
+    def apply(self, game_state: GameState, diff: StateDiff) -> None:
+        super().apply(game_state, diff)
+        if self.key_type in diff.totals:
+            self.query_one('.entry-value', Static).update(parsed(abbrev_num(diff.totals[self.key_type])))
 
 
 class ProducerRow(Row):
@@ -75,16 +117,22 @@ class ProducerRow(Row):
         self.boosted = boosted
 
     def compose(self) -> ComposeResult:
-        yield from self.compose_text(inner_text=('[green]⬆[/] ' if self.boosted else '') + self.gather_rate)
-        yield Horizontal(
-            BuyButton(key_type=self.key_type, amount=1),
-            BuyButton(key_type=self.key_type, amount=0),
-            classes='entry-buttons',
-        )
+        yield from self.compose_text(inner_text=self.rate_text())
+        self.buttons = [BuyButton(key_type=self.key_type, amount=1), BuyButton(key_type=self.key_type, amount=0)]
+        yield Horizontal(*self.buttons, classes='entry-buttons')
+
+    def rate_text(self) -> str:
+        return ('[green]⬆[/] ' if self.boosted else '') + self.gather_rate
 
-    def watch_game_state(self, game_state: GameState) -> None:
-        super()._game_state(game_state, game_state.producers[self.key_type].total)
-        self.update_btn_states(game_state.producers)
+    def apply(self, game_state: GameState, diff: StateDiff) -> None:
+        super().apply(game_state, diff)
+        if self.key_type in diff.totals:
+            self.border_title = f'[b cyan]{self.key_type}[/] ({diff.totals[self.key_type]})'
+        if self.key_type in diff.rates:
+            self.gather_rate = game_state.gather_rate(self.key_type)
+            self.boosted = game_state.boosted(self.key_type)
+            self.query_one('.entry-text', Static).update(parsed(self.rate_text()))
+        self.apply_cost(game_state, diff)
 
 
 class UpgradeRow(Row):
@@ -94,16 +142,14 @@ class UpgradeRow(Row):
 
     def compose(self) -> ComposeResult:
         yield from self.compose_text(inner_text=self.upgrade_text)
-        yield Horizontal(
-            Button(
-                label='Buy',
-                id=f'{type_class(self.key_type)}-upgrade',
-                classes='buy buy-upgrade',
-                disabled=True,
-            ),
-            classes='entry-buttons',
-        )
-
-    def watch_game_state(self, game_state: GameState) -> None:
-        super()._game_state(game_state, game_state.upgrades[self.key_type].total)
-        self.update_btn_states(game_state.upgrades)
+        self.buttons = [
+            Button(label='Buy', id=f'{type_class(self.key_type)}-upgrade', classes='buy buy-upgrade', disabled=True)
+        ]
+        yield Horizontal(*self.buttons, classes='entry-buttons')
+
+    def apply(self, game_state: GameState, diff: StateDiff) -> None:
+        super().apply(game_state, diff)
+        if self.key_type in diff.infos:
+            self.upgrade_text = game_state.upgrades[self.key_type].info
+            self.query_one('.entry-text', Static).update(parsed(self.upgrade_text))
+        self.apply_cost(game_state, diff)
@@ -0,0 +1,19 @@
+import pytest
+
+from game.game_state import GameState
+from game.sim import greedy, new_game
+
+
+def play(state: GameState, ticks: int, clicks: int = 5) -> GameState:
+    """`ticks` ticks of greedy play with steady clicking, like a headless sim run"""
+    for _ in range(ticks):
+        state.gather(clicks)
+        greedy(state)
+        state.tick()
+    return state
+
+
+@pytest.fixture(scope='session')
+def played() -> GameState:
+    """A mid-game state, with Producers and Upgrades bought.  Shared, so clone it before changing anything."""
+    return play(new_game(), 600)
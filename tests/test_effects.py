@@ -0,0 +1,124 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from shared import ProducerType
+from game.effects import BITS, CLICK, HZ, Effects, TimerWheel
+
+
+@dataclass(eq=False)
+class Entry:
+    due: int
+    slot: tuple[int, int] | None = None
+
+
+def schedule(wheel: TimerWheel, *dues: int) -> list[Entry]:
+    entries = [Entry(due) for due in dues]
+    for entry in entries:
+        wheel.schedule(entry)
+    return entries
+
+
+# Either side of where an entry goes up a level, from the lowest level to the fourth
+EDGES = [d for level in range(1, 4) for edge in [1 << (BITS * level)] for d in (edge - 1, edge, edge + 1)]
+
+
+@pytest.mark.parametrize('start', [0, 5, (1 << BITS) - 1, (1 << (2 * BITS)) + 17])
+def test_entries_come_due_on_their_tick_across_levels(start):
+    wheel = TimerWheel(start)
+    entries = schedule(wheel, *(start + d for d in [1, 2, *EDGES]))
+    for entry in entries:
+        # Everything is due exactly when the clock reaches it, whichever level it started on
+        assert wheel.advance(entry.due - 1) == []
+        assert wheel.advance(entry.due) == [entry]
+        assert entry.slot is None
+    assert len(wheel) == 0
+
+
+def test_one_big_advance_returns_everything_due():
+    wheel = TimerWheel()
+    entries = schedule(wheel, *EDGES, 1, 3)
+    middle = 1 << (2 * BITS)
+    due = wheel.advance(middle)
+    assert {id(e) for e in due} == {id(e) for e in entries if e.due <= middle}
+    assert len(wheel) == sum(e.due > middle for e in entries)
+    assert wheel.next_due() == middle + 1
+
+
+def test_matches_a_sorted_list_under_random_use():
+    rng = random.Random(24)
+    wheel = TimerWheel()
+    waiting: list[Entry] = []
+    for _ in range(3000):
+        action = rng.random()
+        if action < 0.5:
+            # Mostly near, sometimes several levels out
+            entry = Entry(wheel.now + rng.choice([rng.randint(1, 80), rng.randint(1, 1 << (3 * BITS))]))
+            wheel.schedule(entry)
+            waiting.append(entry)
+        elif action < 0.6 and waiting:
+            entry = waiting.pop(rng.randrange(len(waiting)))
+            wheel.cancel(entry)
+        else:
+            to = wheel.now + rng.choice([1, rng.randint(1, 200), rng.randint(1, 1 << (2 * BITS))])
+            expected = {id(e) for e in waiting if e.due <= to}
+            assert {id(e) for e in wheel.advance(to)} == expected
+            waiting = [e for e in waiting if e.due > to]
+        assert len(wheel) == len(waiting)
+        assert wheel.next_due() == min((e.due for e in waiting), default=None)
+
+
+def test_cannot_schedule_in_the_past():
+    wheel = TimerWheel(10)
+    with pytest.raises(ValueError):
+        wheel.schedule(Entry(10))
+
+
+def test_stacked_effects_multiply_and_run_out_in_order():
+    effects = Effects()
+    expired = []
+    effects.listeners.append(expired.append)
+    first = effects.add(ProducerType.ANT, 2.0, 5)
+    second = effects.add(ProducerType.ANT, 3.0, 70)
+    third = effects.add(CLICK, 1.5, 5)
+    assert effects.multiplier(ProducerType.ANT) == 6.0
+    assert effects.advance(4.0) == []
+    assert effects.advance(1.0) == [first, third]
+    assert expired == [first, third]
+    assert effects.multiplier(ProducerType.ANT) == 3.0
+    assert not effects.active(CLICK)
+    # Well past the lowest level of the wheel in one go
+    assert effects.advance(600.0) == [second]
+    assert effects.multiplier(ProducerType.ANT) == 1.0
+    assert len(effects) == 0
+
+
+def test_effects_run_out_to_the_nearest_tick_of_the_clock():
+    effects = Effects()
+    effect = effects.add(ProducerType.ANT, 2.0, 1.5 + 0.5 / HZ)
+    assert effects.next_expiry() == 1.5 + 1 / HZ
+    assert effects.advance(1.5) == []
+    assert effects.advance(1 / HZ) == [effect]
+
+
+def test_cancelled_effects_never_run_out():
+    effects = Effects()
+    expired = []
+    effects.listeners.append(expired.append)
+    effect = effects.add(ProducerType.ANT, 2.0, 10)
+    effects.cancel(effect)
+    assert effects.multiplier(ProducerType.ANT) == 1.0
+    assert effects.advance(20.0) == []
+    assert expired == []
+
+
+def test_clone_keeps_time_left():
+    effects = Effects()
+    effects.add(ProducerType.ANT, 2.0, 100)
+    effects.advance(30.0)
+    clone = effects.clone()
+    assert [clone.remaining(e) for e in clone] == [70.0]
+    assert clone.advance(69.0) == []
+    assert len(clone.advance(1.0)) == 1
+    assert len(effects) == 1
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from shared import ResourceType
+from game.commands import BuyProducer, BuyUpgrade, Command, Gather
+from game.journal import (
+    _HEADER,
+    _OLD_PAYLOADS,
+    _OP,
+    GATHER,
+    JOURNAL_MAGIC,
+    KEYFRAME,
+    KEYFRAME_TICKS,
+    TICKS,
+    Journal,
+    Replay,
+    parse,
+)
+from game.save import dumps
+from game.sim import can_buy_upgrade, new_game
+
+TICKS_PLAYED = 2 * KEYFRAME_TICKS + 150
+
+
+def commands(state, rng: random.Random) -> list[Command]:
+    """What a player might do in one second: some presses, and maybe a purchase"""
+    batch: list[Command] = [Gather(rng.randint(1, 8))]
+    if upgrades := [u for u in state.upgrades if can_buy_upgrade(state, u)]:
+        batch.append(BuyUpgrade(rng.choice(upgrades)))
+    if producers := [p for p in state.producers if state.affordable(p)]:
+        batch.append(BuyProducer(rng.choice(producers), rng.choice([1, 0])))
+    return batch
+
+
+@pytest.fixture(scope='module')
+def session(tmp_path_factory) -> tuple[str, dict[int, bytes]]:
+    """A journaled session, and the save of the straight run right after every tick"""
+    path = str(tmp_path_factory.mktemp('journal') / 'idle-ant.journal')
+    rng = random.Random(11)
+    state = new_game()
+    journal = Journal(path, state)
+    saves = {}
+    for tick in range(1, TICKS_PLAYED + 1):
+        if rng.random() < 0.6:
+            batch = commands(state, rng)
+            state.apply(batch)
+            journal.apply(batch)
+        state.tick()
+        journal.tick(state)
+        saves[tick] = dumps(state)
+    journal.close()
+    return path, saves
+
+
+@pytest.mark.parametrize('tick', [1, 2, KEYFRAME_TICKS - 1, KEYFRAME_TICKS, KEYFRAME_TICKS + 1, 437, TICKS_PLAYED])
+def test_seek_matches_the_straight_run(session, tick):
+    path, saves = session
+    assert dumps(Replay.open(path).seek(tick)) == saves[tick]
+
+
+def test_replay_to_the_end_matches_the_straight_run(session):
+    path, saves = session
+    replay = Replay.open(path)
+    assert replay.end_tick == TICKS_PLAYED
+    assert dumps(replay.seek()) == saves[TICKS_PLAYED]
+
+
+def test_verify_passes_every_keyframe(session):
+    path, saves = session
+    assert dumps(Replay.open(path).seek(verify=True)) == saves[TICKS_PLAYED]
+
+
+def test_a_gather_is_one_record(tmp_path):
+    path = str(tmp_path / 'idle-ant.journal')
+    state = new_game()
+    journal = Journal(path, state)
+    # Past what one record holds, so it's split in two
+    batch = [Gather(70_000), Gather(3)]
+    state.apply(batch)
+    journal.apply(batch)
+    journal.close()
+    with open(path, 'rb') as f:
+        events, _ = parse(f.read())
+    assert [payload for _, op, payload in events if op == GATHER] == [(0xFFFF,), (70_000 - 0xFFFF,), (3,)]
+    assert Replay.open(path).seek().resources[ResourceType.FOOD].total == state.resources[ResourceType.FOOD].total
+
+
+def test_version_2_gathers_replay_one_press_each():
+    state = new_game()
+    keyframe = dumps(state)
+    data = [
+        _HEADER.pack(JOURNAL_MAGIC, 2),
+        _OP.pack(KEYFRAME) + _OLD_PAYLOADS[KEYFRAME].pack(0, len(keyframe)) + keyframe,
+    ]
+    data += [_OP.pack(GATHER)] * 3
+    data.append(_OP.pack(TICKS) + _OLD_PAYLOADS[TICKS].pack(1))
+    state.gather(3)
+    state.tick()
+    assert dumps(Replay(b''.join(data)).seek()) == dumps(state)
+
+
+def test_a_cut_off_record_ends_the_journal(session):
+    path, saves = session
+    with open(path, 'rb') as f:
+        data = f.read()
+    events, size = parse(data[:-3])
+    assert size < len(data) - 3
+    assert len(events) == len(parse(data)[0]) - 1
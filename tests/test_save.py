@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from shared import ProducerType, Status, UpgradeType
+from game.effects import CLICK
+from game.save import SAVE_VERSION, SaveError, dumps, loads
+from game.sim import new_game
+
+
+def test_new_game_round_trips():
+    state = new_game()
+    assert dumps(loads(dumps(state))) == dumps(state)
+
+
+def test_played_game_round_trips(played):
+    loaded = loads(dumps(played))
+    assert dumps(loaded) == dumps(played)
+    assert loaded.click_modifier == played.click_modifier
+    for key, resource in played.resources.items():
+        assert (loaded.resources[key].total, loaded.resources[key].progress) == (resource.total, resource.progress)
+        assert loaded.resources[key].status == resource.status
+    for key, producer in played.producers.items():
+        assert loaded.producers[key].total == producer.total
+        assert loaded.producers[key].cost == producer.cost
+        assert loaded.producers[key].product.rate == producer.product.rate
+    assert [u.purchased for u in loaded.upgrades.values()] == [u.purchased for u in played.upgrades.values()]
+
+
+def test_loaded_game_plays_on_identically(played):
+    state = played.clone()
+    loaded = loads(dumps(state))
+    for _ in range(100):
+        state.tick()
+        loaded.tick()
+    assert dumps(loaded) == dumps(state)
+
+
+def test_running_effects_keep_their_time_left():
+    state = new_game()
+    state.effects.add(ProducerType.ANT, 2.0, 30)
+    state.effects.add(CLICK, 1.5, 12.5)
+    state.effects.advance(4.0)
+    loaded = loads(dumps(state))
+    effects = [(e.target, e.multiplier, loaded.effects.remaining(e)) for e in loaded.effects]
+    assert effects == [(ProducerType.ANT, 2.0, 26.0), (CLICK, 1.5, 8.5)]
+
+
+def test_retired_entities_come_back_retired(played):
+    state = played.clone()
+    # Its only cost is the Ants it folds away
+    state.upgrades[UpgradeType.INDUSTRIAL_FARMING].status = Status.ENABLED
+    state.purchase_upgrade(UpgradeType.INDUSTRIAL_FARMING)
+    loaded = loads(dumps(state))
+    assert loaded.retired == {ProducerType.ANT}
+    assert ProducerType.ANT not in loaded.live.producers
+    assert loaded.producers[ProducerType.ANT].status == Status.DISABLED
+
+
+def test_other_versions_are_rejected():
+    data = bytearray(dumps(new_game()))
+    data[3] = SAVE_VERSION + 1
+    with pytest.raises(SaveError, match='version'):
+        loads(bytes(data))
+
+
+def test_different_entity_counts_are_rejected():
+    data = bytearray(dumps(new_game()))
+    # The Resource count, right after the magic, version and click modifier
+    data[struct.calcsize('<3sBd')] += 1
+    with pytest.raises(SaveError, match='version'):
+        loads(bytes(data))
+
+
+def test_other_files_are_rejected():
+    with pytest.raises(SaveError, match='Not an idle-ant save'):
+        loads(b'XYZ' + dumps(new_game())[3:])
+
+
+@pytest.mark.parametrize('cut', [1, 8, 100])
+def test_truncated_saves_are_rejected(cut):
+    data = dumps(new_game())
+    with pytest.raises(SaveError):
+        loads(data[:-cut])
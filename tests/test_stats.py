@@ -0,0 +1,74 @@
+import pytest
+
+from shared import ResourceType
+from game.sim import new_game
+from game.stats import FLUSH_TICKS, StatsRecorder, read_log
+
+from conftest import play
+
+TICKS = 2 * FLUSH_TICKS + 30
+
+
+@pytest.fixture
+def logged(tmp_path) -> tuple[str, StatsRecorder]:
+    """A log of TICKS ticks of play: two full blocks and a partial one written on close"""
+    path = str(tmp_path / 'idle-ant.stats')
+    state = new_game()
+    state.stats = StatsRecorder(path)
+    play(state, TICKS)
+    state.stats.close()
+    return path, state.stats
+
+
+def test_log_holds_every_tick_and_purchase(logged):
+    path, recorder = logged
+    [(columns, rows, events)] = list(read_log(path))
+    assert columns == ['tick', *recorder.columns]
+    assert [row[0] for row in rows] == list(range(TICKS))
+    width = len(recorder.resources)
+    for row in rows:
+        tick = row[0]
+        assert row[1 : 1 + width] == [column[tick] for column in recorder.totals]
+        assert row[1 + width :] == [column[tick] for column in recorder.rates]
+    assert events == list(recorder.events)
+    assert events
+
+
+def test_truncated_block_ends_the_session(logged):
+    path, _ = logged
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        # Partway through the last block, as a crash mid-write would leave it
+        f.write(data[:-10])
+    [(_, rows, _)] = list(read_log(path))
+    assert [row[0] for row in rows] == list(range(2 * FLUSH_TICKS))
+
+
+def test_truncated_record_header_is_ignored(logged):
+    path, _ = logged
+    with open(path, 'ab') as f:
+        f.write(b'B\x05')
+    [(_, rows, _)] = list(read_log(path))
+    assert len(rows) == TICKS
+
+
+def test_each_recorder_starts_a_session(logged):
+    path, _ = logged
+    state = new_game()
+    state.stats = StatsRecorder(path)
+    play(state, 5)
+    state.stats.close()
+    sessions = list(read_log(path))
+    assert [len(rows) for _, rows, _ in sessions] == [TICKS, 5]
+    assert [row[0] for row in sessions[1][1]] == list(range(5))
+
+
+def test_rate_averages_the_recorded_rates():
+    state = new_game()
+    state.stats = StatsRecorder(None, capacity=FLUSH_TICKS + 10)
+    play(state, 3 * FLUSH_TICKS)
+    j = state.stats.index[ResourceType.FOOD]
+    column = state.stats.rates[j]
+    recent = [column[t % state.stats.capacity] for t in range(state.stats.tick - 30, state.stats.tick)]
+    assert state.stats.rate(ResourceType.FOOD, 30) == pytest.approx(sum(recent) / 30)